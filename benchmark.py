@@ -0,0 +1,256 @@
+"""
+Sudoku Benchmarks
+性能基准：求解、生成、校验、渲染热点，输出 JSON 并与基线比较
+
+    python benchmark.py                          # 运行全部并打印
+    python benchmark.py --json bench.json        # 保存结果
+    python benchmark.py --save-baseline          # 把本次结果存为基线
+    python benchmark.py --baseline bench_baseline.json --threshold 0.25
+                                                 # 比基线慢 25% 以上返回非 0
+
+渲染部分用 SDL dummy 驱动离屏运行，没有 pygame 时自动跳过。
+"""
+
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from sudoku_logic import SudokuLogic, BoardState
+
+DEFAULT_BASELINE = 'bench_baseline.json'
+
+# 固定的难题语料（均为唯一解）
+HARD_PUZZLES = {
+    'inkala': "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    'golden_nugget': "..53.....8......2..7..1.5..4....53...1..7...6..32...8..6.5....9..4....3......97..",
+    'hard_1': "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+    'backtrack_killer': "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+    'norvig_hard': "6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....",
+    'norvig_hardest': "48.3............71.2.......7.5....6....2..8.............1.76...3.....4......5....",
+    'norvig_hard1': "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+    'seventeen_clue': "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+    'platinum': "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+}
+
+
+def parse_puzzle(text):
+    """81 位字符串（. 或 0 为空格）-> 二维列表"""
+    digits = [0 if ch in '.0' else int(ch) for ch in text]
+    return [digits[r * 9:r * 9 + 9] for r in range(9)]
+
+
+def measure(fn, repeat=5, number=1, setup=None):
+    """运行 repeat 轮、每轮 number 次，返回每次耗时（毫秒）的统计"""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(arg) if setup else fn()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    samples.sort()
+    return {
+        'median_ms': samples[len(samples) // 2],
+        'min_ms': samples[0],
+        'max_ms': samples[-1],
+        'runs': repeat * number,
+    }
+
+
+def bench_logic(quick=False):
+    logic = SudokuLogic(rng=random.Random(1))
+    results = {}
+    repeat = 3 if quick else 7
+
+    for name, text in HARD_PUZZLES.items():
+        puzzle = parse_puzzle(text)
+        results[f'solve.{name}'] = measure(
+            logic.solve, repeat, setup=lambda: [row[:] for row in puzzle])
+        results[f'count_solutions.{name}'] = measure(
+            lambda: logic.count_solutions(puzzle, 2), repeat)
+
+    for diff in ('easy', 'medium', 'hard', 'expert'):
+        rng = random.Random(diff)
+        gen = SudokuLogic(rng=rng)
+        results[f'generate_puzzle.{diff}'] = measure(
+            lambda: gen.generate_puzzle(diff), repeat, 2 if quick else 5)
+        results[f'generate_puzzle_graded.{diff}'] = measure(
+            lambda: gen.generate_puzzle(diff, graded=True), repeat, 1 if quick else 3)
+        results[f'generate_puzzle_transform.{diff}'] = measure(
+            lambda: gen.generate_puzzle(diff, source='transform'), repeat, 200)
+
+    from sudoku_grader import grade
+    graded = [SudokuLogic(rng=random.Random(k)).generate_puzzle('expert') for k in range(5)]
+    results['grade.expert'] = measure(lambda: [grade(p, s) for p, s in graded], repeat)
+
+    from sudoku_canonical import CanonicalIndex, canonical_key
+    results['canonical_key.expert'] = measure(lambda: [canonical_key(p) for p, _ in graded], repeat, 10)
+    index = CanonicalIndex()
+    for p, _ in graded:
+        index.add(p)
+    values = list(range(1, 1001))
+    results['canonical_index.lookup'] = measure(
+        lambda: [index.has_fingerprint(v) for v in values], repeat, 10)
+
+    from sudoku_hints import find_hint
+    grids = [logic.candidate_grid(p) for p, _ in graded]
+    results['find_hint.expert'] = measure(lambda: [find_hint(g, s) for g, (_, s) in zip(grids, graded)], repeat)
+
+    solved = logic.generate_full_board()
+    board = solved.copy()
+    results['board.copy'] = measure(board.copy, repeat, 2000)
+    results['check_complete'] = measure(lambda: logic.check_complete(board), repeat, 200)
+    board[8, 8] = 0
+    digit = solved[8, 8]
+    results['is_valid'] = measure(lambda: logic.is_valid(board, 8, 8, digit), repeat, 2000)
+
+    state = BoardState(board)
+    results['board_state.set'] = measure(
+        lambda: (state.set(8, 8, digit), state.set(8, 8, 0)), repeat, 1000)
+
+    grid = logic.candidate_grid(board)
+    results['candidates.set'] = measure(
+        lambda: (grid.set(80, digit), grid.set(80, 0)), repeat, 1000)
+    return results
+
+
+def bench_render(quick=False):
+    """离屏渲染基准，没有 pygame 时返回空结果"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    try:
+        import pygame
+    except ImportError:
+        return {}
+    import warnings
+    warnings.filterwarnings('ignore', module='pygame')
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((720, 1280))
+    from game_mobile import SudokuGameMobile
+
+    random.seed(7)
+    repeat = 3 if quick else 7
+    results = {}
+    # 构造 + 首帧（不含 pygame 导入；谜题池线程在 run() 的首帧之后才启动）
+    results['startup.first_frame'] = measure(
+        lambda: SudokuGameMobile(manual_screen=screen, pool_depth=0).draw(), repeat, 5)
+
+    game = SudokuGameMobile(manual_screen=screen, pool_depth=0)
+    game.new_game('medium')
+    game.selected_cell = (4, 4)
+    results['render.draw_game_lite'] = measure(game.draw_game_lite, repeat, 20)
+
+    def toggle_selection():
+        game.selected_cell = (0, 0) if game.selected_cell == (4, 4) else (4, 4)
+        game.draw_game_dirty()
+    results['render.draw_game_dirty'] = measure(toggle_selection, repeat, 50)
+
+    # 一次点击：事件归一化 + 命中 + 选中格子（不含绘制）
+    taps = [pygame.event.Event(pygame.FINGERDOWN, x=(game.grid_x + (k % 9 + 0.5) * game.cell_size) / game.width,
+                               y=(game.grid_y + 4.5 * game.cell_size) / game.height,
+                               dx=0.0, dy=0.0, finger_id=0, touch_id=0, pressure=1.0) for k in range(9)]
+    results['input.tap_cell'] = measure(lambda: [game.handle_input([tap]) for tap in taps], repeat, 20)
+
+    rich = SudokuGameMobile(manual_screen=screen, pool_depth=0, rich_ui=True)
+    rich.puzzle_pool.stop()
+    ui = rich.ui_manager
+    rich.new_game('medium')
+    rich.selected_cell = (4, 4)
+    results['render.rich.draw_game'] = measure(rich.draw_game, repeat, 10)
+    rich.state = 'won'
+    results['render.rich.draw_won'] = measure(rich.draw_won, repeat, 10)
+
+    cell = pygame.Rect(20, 20, rich.cell_size, rich.cell_size)
+    variants = rich.cell_variants()
+    results['render.ui.draw_3d_cell'] = measure(lambda: ui.draw_3d_cell(cell, True), repeat, 200)
+    results['render.ui.draw_cell_grid'] = measure(
+        lambda: ui.draw_cell_grid((rich.grid_x, rich.grid_y), rich.cell_size, variants), repeat, 50)
+    results['render.ui.draw_3d_number'] = measure(
+        lambda: ui.draw_3d_number(7, cell.center, rich.cell_font), repeat, 200)
+    button = pygame.Rect(40, 40, 300, 60)
+    results['render.ui.draw_button'] = measure(
+        lambda: ui.draw_button(button, 'Hint', rich.button_font), repeat, 100)
+    results['render.ui.draw_glass_rect'] = measure(
+        lambda: ui.draw_glass_rect(pygame.Rect(20, 20, 600, 600)), repeat, 100)
+    results['render.ui.draw_particle_bg'] = measure(
+        lambda: ui.draw_particle_bg(pygame.time.get_ticks()), repeat, 100)
+
+    pygame.quit()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """返回 [(名称, 基线毫秒, 当前毫秒, 变化比例)]，只列出变慢超过阈值的项"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or base['median_ms'] <= 0:
+            continue
+        change = stats['median_ms'] / base['median_ms'] - 1
+        if change > threshold:
+            regressions.append((name, base['median_ms'], stats['median_ms'], change))
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="数独性能基准")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    parser.add_argument('--baseline', help="与该基线 JSON 比较（默认 %s，存在时）" % DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help="把结果存为基线")
+    parser.add_argument('--threshold', type=float, default=0.25, help="中位数变慢超过该比例视为回退")
+    parser.add_argument('--filter', help="只保留名称包含该字符串的项")
+    parser.add_argument('--quick', action='store_true', help="减少重复次数")
+    parser.add_argument('--no-render', action='store_true', help="跳过渲染基准")
+    args = parser.parse_args(argv)
+
+    results = bench_logic(args.quick)
+    if not args.no_render:
+        results.update(bench_render(args.quick))
+    if args.filter:
+        results = {name: stats for name, stats in results.items() if args.filter in name}
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+
+    width = max(len(name) for name in results) if results else 0
+    for name, stats in results.items():
+        print(f"{name:<{width}}  {stats['median_ms']:10.4f} ms  (min {stats['min_ms']:.4f})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    baseline_path = args.baseline or (DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE)
+                                      and not args.save_baseline else None)
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, base_ms, now_ms, change in regressions:
+            print(f"REGRESSION {name}: {base_ms:.4f} -> {now_ms:.4f} ms (+{change:.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions against {baseline_path} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
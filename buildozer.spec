@@ -19,7 +19,7 @@ source.dir = .
 source.main_py = main_mobile.py
 
 # (list) Source files to include (let empty to include all the files)
-source.include_exts = py,png,jpg,kv,atlas,txt,md
+source.include_exts = py,png,jpg,kv,atlas,txt,md,bank
 
 # (str) Application versioning (method 1)
 version = 2.1
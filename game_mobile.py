@@ -4,24 +4,61 @@ Sudoku Game - Mobile Compatible Version
 支持触摸屏操作
 """
 
+import os
 import pygame
 import sys
 import time
-from sudoku_logic import SudokuLogic
-from sudoku_logic import SudokuLogic
-# 💉 排雷：暂时禁用可能导致崩溃的复杂 UI 管理器
-# from sudoku_ui import SudokuUIManager
+from collections import deque
+from sudoku_logic import SudokuLogic, BoardState
+from sudoku_pool import PuzzlePool
+from sudoku_cache import GlyphCache
+from sudoku_candidates import PencilMarks
+from sudoku_history import DIGIT, NOTES, MoveHistory
+from sudoku_input import TAP_EVENTS, HitMap, TapFilter
+from sudoku_startup import StartupCache
+# 💉 排雷：复杂 UI 管理器默认禁用，rich_ui=True 时才按需导入
+# 存档、提示引擎也在第一次用到时才导入，缩短冷启动
+
+# 安卓系统字体的常见位置：逐个 stat，比扫描系统字体快得多
+FONT_FILES = (
+    "/system/fonts/NotoSansCJK-Regular.ttc",
+    "/system/fonts/NotoSansSC-Regular.otf",
+    "/system/fonts/DroidSansFallback.ttf",
+    "/system/fonts/Roboto-Regular.ttf",
+)
+FONT_NAMES = ["noto sans cjk jp", "noto sans cjk sc", "droid sans fallback", "arial"]
 
 # Mobile-friendly helpers
-def get_safe_fonts(size, bold=False):
-    """安卓兼容的字体获取逻辑"""
-    test_fonts = ["sans-serif", "noto sans cjk jp", "arial", "droid sans fallback", None]
-    for font_name in test_fonts:
-        try:
-            return pygame.font.SysFont(font_name, size, bold=bold)
-        except:
-            continue
-    return pygame.font.Font(None, size)
+def find_font_path():
+    """找一个可用的字体文件，找不到返回 None（pygame 自带字体）"""
+    for path in FONT_FILES:
+        if os.path.exists(path):
+            return path
+    try:
+        # 这里会扫描系统字体，结果应缓存起来，不要每次启动都调用
+        return pygame.font.match_font(FONT_NAMES)
+    except Exception:
+        return None
+
+def get_safe_fonts(size, bold=False, path=None):
+    """按字体文件路径加载（None 为 pygame 自带字体），不触发系统字体扫描"""
+    try:
+        font = pygame.font.Font(path, size)
+    except (OSError, RuntimeError):
+        font = pygame.font.Font(None, size)
+    if bold:
+        font.set_bold(True)
+    return font
+
+def compute_layout(width, height):
+    """棋盘布局参数（只依赖屏幕尺寸）"""
+    grid_size = min(int(width * 0.92), 520)
+    return {
+        'grid_size': grid_size,
+        'cell_size': grid_size // 9,
+        'grid_x': (width - grid_size) // 2,
+        'grid_y': int(height * 0.12),
+    }
 
 # Colors (Static)
 BG_COLOR = (10, 15, 30)
@@ -31,37 +68,91 @@ USER_COLOR = (255, 255, 255)
 SELECTED_COLOR = (0, 255, 255, 100)
 ERROR_COLOR = (255, 100, 100)
 CORRECT_COLOR = (100, 255, 150)
+NOTE_COLOR = (140, 170, 210)
+
+# Frame pacing: 有输入时满帧，空闲后降到低帧率省电
+ACTIVE_FPS = 60
+IDLE_FPS = 10
+IDLE_AFTER = 1.0  # 秒
+
+# 功能按钮，从左到右
+CONTROL_KEYS = ('delete', 'notes', 'undo', 'redo', 'hint', 'check')
+MENU_DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+
+# 自动存档：最后一次改动后停顿这么久就写盘，连续操作时最多拖这么久
+AUTOSAVE_DELAY = 2.0  # 秒
+AUTOSAVE_MAX_DELAY = 10.0
+
+# 应用切到后台/即将被杀时立即存档（旧版 pygame 没有这些事件）
+PAUSE_EVENTS = tuple(getattr(pygame, name) for name in (
+    'APP_WILLENTERBACKGROUND', 'APP_DIDENTERBACKGROUND', 'APP_TERMINATING', 'APP_LOWMEMORY',
+    'WINDOWMINIMIZED', 'WINDOWFOCUSLOST') if hasattr(pygame, name))
+
+# 无头模式默认画布尺寸
+HEADLESS_SIZE = (720, 1280)
 
 class SudokuGameMobile:
-    def __init__(self, language='zh', manual_screen=None):
+    def __init__(self, language='zh', manual_screen=None, pool_depth=2, dirty_rects=True,
+                 rich_ui=False, profile=False, trace_path=None, headless=False, event_source=None,
+                 save_path=None, startup_cache=None, launch_time=None):
         # 1. 资源与屏幕初始化
+        # 无头模式：离屏画布、不刷新显示、不限帧，事件可由外部注入
+        self.headless = headless
+        self.event_source = event_source or pygame.event.get
+        if manual_screen is None and headless:
+            manual_screen = pygame.Surface(HEADLESS_SIZE)
         self.screen = manual_screen
         self.width, self.height = self.screen.get_size()
         self.clock = pygame.time.Clock()
         
-        # 2. 文字系统（极简字体）
+        # 启动缓存（startup_cache 为路径）：上次解析出的字体路径和布局直接用
+        # launch_time 是进程启动时的 perf_counter，用来统计首帧耗时
+        self.startup_cache = StartupCache(startup_cache) if startup_cache else None
+        self.launch_time = launch_time
+        self.first_frame_ms = None
+        
+        # 2. 文字系统（极简字体）：有缓存用缓存，有缓存机制但还没缓存时先用自带字体画首帧
         self.language = language
         self.texts = self._get_texts()
-        font_scale = self.width / 400
-        self.title_font = get_safe_fonts(int(24 * font_scale), bold=True)
-        self.cell_font = get_safe_fonts(int(18 * font_scale), bold=True)
-        self.small_font = get_safe_fonts(int(10 * font_scale))
-        
-        # 3. 布局逻辑
-        self.grid_size = int(self.width * 0.9)
-        self.cell_size = self.grid_size // 9
-        self.grid_x = (self.width - self.grid_size) // 2
-        self.grid_y = int(self.height * 0.1)
+        self.glyphs = GlyphCache()
+        self.font_path = None
+        self.fonts_resolved = False
+        if self.startup_cache is None:
+            self.font_path = find_font_path()
+            self.fonts_resolved = True
+        elif 'font_path' in self.startup_cache.data:
+            cached = self.startup_cache.get('font_path')
+            if cached is None or os.path.exists(cached):
+                self.font_path = cached
+                self.fonts_resolved = True
+        self.font_scale = None
+        self.set_font_scale(self.width / 400)
+        
+        # 3. 布局参数（屏幕尺寸没变就用缓存）
+        layout = None
+        if self.startup_cache is not None:
+            cached = self.startup_cache.get('layout')
+            if cached and cached.get('size') == [self.width, self.height]:
+                layout = cached
+        if layout is None:
+            layout = compute_layout(self.width, self.height)
+            if self.startup_cache is not None:
+                self.startup_cache.set('layout', dict(layout, size=[self.width, self.height]))
+        self.grid_size = layout['grid_size']
+        self.cell_size = layout['cell_size']
+        self.grid_x = layout['grid_x']
+        self.grid_y = layout['grid_y']
         
         # 4. 逻辑引擎（禁用背景粒子）
         self.logic = SudokuLogic()
         self.ui_manager = None # 极简模式下不使用 UI 管理器
+        if rich_ui:
+            from sudoku_ui import SudokuUIManager
+            self.ui_manager = SudokuUIManager(self.screen, self.glyphs)
         
-        # 5. 布局参数计算
-        self.grid_size = min(int(self.width * 0.92), 520)
-        self.cell_size = self.grid_size // 9
-        self.grid_x = (self.width - self.grid_size) // 2
-        self.grid_y = int(self.height * 0.12)
+        # 后台谜题池：菜单/游戏中持续补货，新游戏直接取用（优先读离线题库，现场生成时按技巧评级）
+        # 补货线程在首帧画完后才启动（见 after_first_frame），不和首帧抢 CPU
+        self.puzzle_pool = PuzzlePool(depth=pool_depth, source='bank', graded=True, dedupe=True)
         
         # Game state
         self.state = "menu"
@@ -69,19 +160,105 @@ class SudokuGameMobile:
         self.puzzle = None
         self.solution = None
         self.current_board = None
+        self.board_state = None
+        self.candidates = None       # 候选网格，随落子增量更新，供提示使用
+        self.notes = PencilMarks()   # 玩家笔记
+        self.note_mode = False
+        self.message = None          # 提示理由等一行说明文字
         self.fixed_cells = set()
         self.selected_cell = None
         self.errors = set()
-        self.history = []
+        self.history = MoveHistory()  # 撤销/重做，容量有上限
         self.start_time = None
         self.elapsed_time = 0
         
         # Mobile-specific: Number pad buttons
         self.number_buttons = []
         self.setup_number_pad()
+        
+        # 输入：手指/鼠标去重，记录点击到出帧的延迟（毫秒）
+        self.taps = TapFilter()
+        self.tap_started = None
+        self.tap_latencies = deque(maxlen=600)
+        
+        # 脏矩形渲染：只重绘内容变化的格子
+        self.dirty_rects = dirty_rects
+        self.needs_full_redraw = True
+        self.drawn_state = None
+        self.cell_keys = [None] * 81
+        self.last_activity = time.time()
+        
+        # 性能分析（默认关闭，关闭时不包装任何方法）
+        self.profiler = None
+        self.trace_path = trace_path
+        if profile:
+            self.enable_profiler()
+        
+        # 存档（save_path 为 None 时不读写），有进行中的对局就直接恢复
+        self.save_path = save_path
+        self.first_change = None
+        self.last_change = None
+        if save_path:
+            self.resume()
+    
+    def enable_profiler(self):
+        """给输入、绘制和逻辑热点方法加计时"""
+        from sudoku_profiler import FrameProfiler
+        self.profiler = FrameProfiler()
+        self.profiler.instrument(self, [
+            'handle_input', 'handle_menu_touch', 'handle_game_touch', 'place_number', 'new_game',
+            'get_hint', 'check_solution', 'draw', 'draw_menu_lite', 'draw_game_lite', 'draw_game_dirty',
+            'draw_rich', 'draw_menu', 'draw_game', 'draw_grid', 'draw_number_pad', 'draw_won',
+        ])
+        self.profiler.instrument(self.logic, ['solve', 'check_complete', 'find_hint', 'generate_puzzle'],
+                                 'logic.')
+        self.profiler.instrument(self.puzzle_pool, ['get'], 'pool.')
+        self.profiler.instrument(self.puzzle_pool.worker_logic, ['generate_puzzle'], 'worker.')
+        if self.ui_manager is not None:
+            self.profiler.instrument(self.ui_manager, [
+                'draw_particle_bg', 'draw_cell_grid', 'draw_button', 'draw_glass_rect',
+                'draw_3d_number', 'draw_3d_text', 'draw_neon_text',
+            ], 'ui.')
+    
+    def resolve_fonts(self):
+        """查找系统字体并写入启动缓存，换了字体就整屏重绘"""
+        self.fonts_resolved = True
+        path = find_font_path()
+        if self.startup_cache is not None:
+            self.startup_cache.set('font_path', path)
+        if path != self.font_path:
+            self.font_path = path
+            scale, self.font_scale = self.font_scale, None
+            self.set_font_scale(scale)
+            self.needs_full_redraw = True
+    
+    def after_first_frame(self):
+        """首帧之后再做的启动工作：记录首帧耗时、解析字体、启动谜题池、写启动缓存"""
+        if self.launch_time is not None:
+            self.first_frame_ms = (time.perf_counter() - self.launch_time) * 1000
+            if self.startup_cache is not None:
+                self.startup_cache.set('first_frame_ms', round(self.first_frame_ms, 1))
+        if not self.fonts_resolved:
+            self.resolve_fonts()
+        self.puzzle_pool.start()
+        if self.startup_cache is not None:
+            self.startup_cache.save()
+    
+    def set_font_scale(self, font_scale):
+        """按缩放重建字体，旧字形全部作废"""
+        if font_scale == self.font_scale:
+            return
+        self.font_scale = font_scale
+        path = self.font_path
+        self.title_font = get_safe_fonts(int(24 * font_scale), bold=True, path=path)
+        self.cell_font = get_safe_fonts(int(18 * font_scale), bold=True, path=path)
+        self.small_font = get_safe_fonts(int(10 * font_scale), path=path)
+        self.button_font = get_safe_fonts(int(14 * font_scale), bold=True, path=path)
+        self.number_button_font = self.cell_font
+        self.glyphs.clear()
     
     def setup_number_pad(self):
-        """设置触摸数字键盘"""
+        """设置触摸数字键盘、功能按钮和菜单按钮，并重建命中表（只在布局变化时调用）"""
         pad_y = self.grid_y + self.grid_size + 15
         button_size = self.cell_size
         gap = 4
@@ -98,10 +275,18 @@ class SudokuGameMobile:
         
         # 功能按钮
         btn_y = pad_y + button_size + 15
-        btn_w = self.grid_size // 3 - 5
-        self.delete_btn = pygame.Rect(self.grid_x, btn_y, btn_w, 45)
-        self.hint_btn = pygame.Rect(self.grid_x + btn_w + 5, btn_y, btn_w, 45)
-        self.check_btn = pygame.Rect(self.grid_x + 2 * (btn_w + 5), btn_y, btn_w, 45)
+        btn_w = self.grid_size // len(CONTROL_KEYS) - 5
+        for k, key in enumerate(CONTROL_KEYS):
+            setattr(self, key + '_btn', pygame.Rect(self.grid_x + k * (btn_w + 5), btn_y, btn_w, 45))
+        
+        # 菜单难度按钮：绘制和命中共用这一份
+        menu_w, menu_h = int(self.width * 0.7), 60
+        self.menu_buttons = [(pygame.Rect((self.width - menu_w) // 2, self.height // 3 + i * (menu_h + 15),
+                                          menu_w, menu_h), diff)
+                             for i, diff in enumerate(MENU_DIFFICULTIES)]
+        
+        self.hit_map = HitMap(self.grid_x, self.grid_y, self.cell_size, start_x, pad_y, button_size, gap,
+                              self.control_buttons(), self.menu_buttons)
     
     def _get_texts(self):
         """根据语言返回文本字典"""
@@ -118,6 +303,9 @@ class SudokuGameMobile:
                 'check': '检查',
                 'new_game': '新游戏',
                 'delete': '删除',
+                'notes': '笔记',
+                'undo': '撤销',
+                'redo': '重做',
                 'victory': '胜利！',
                 'difficulty_label': '难度',
                 'press_to_continue': '点击继续',
@@ -136,6 +324,9 @@ class SudokuGameMobile:
                 'check': 'Check',
                 'new_game': 'New Game',
                 'delete': 'Delete',
+                'notes': 'Notes',
+                'undo': 'Undo',
+                'redo': 'Redo',
                 'victory': 'VICTORY!',
                 'difficulty_label': 'Difficulty',
                 'press_to_continue': 'Tap to continue',
@@ -145,140 +336,311 @@ class SudokuGameMobile:
     def new_game(self, difficulty):
         """开始新游戏"""
         self.difficulty = difficulty
-        self.puzzle, self.solution = self.logic.generate_puzzle(difficulty)
-        self.current_board = [row[:] for row in self.puzzle]
+        self.puzzle, self.solution = self.puzzle_pool.get(difficulty)
+        self.current_board = self.puzzle.copy()
+        self.board_state = BoardState(self.current_board)
+        self.candidates = self.logic.candidate_grid(self.current_board)
+        self.notes = PencilMarks()
+        self.note_mode = False
+        self.message = None
         
-        self.fixed_cells = set()
-        for i in range(9):
-            for j in range(9):
-                if self.puzzle[i][j] != 0:
-                    self.fixed_cells.add((i, j))
+        cells = self.puzzle.cells
+        self.fixed_cells = {(i // 9, i % 9) for i in range(81) if cells[i]}
         
         self.selected_cell = None
         self.errors = set()
-        self.history = []
+        self.history.clear()
         self.start_time = time.time()
         self.state = "playing"
-        self.setup_number_pad()
+        self.needs_full_redraw = True
+        self.mark_dirty()
     
-    def handle_input(self):
-        """处理输入事件（触摸优化）"""
-        for event in pygame.event.get():
+    def handle_input(self, events=None):
+        """处理输入事件（触摸优化），返回本帧是否有事件
+        
+        events 为 None 时从 event_source 读取（默认 pygame.event.get）。
+        """
+        if events is None:
+            events = self.event_source()
+        for event in events:
             if event.type == pygame.QUIT:
+                self.save_game()
+                self.puzzle_pool.stop()
+                if self.profiler and self.trace_path:
+                    self.profiler.dump_trace(self.trace_path)
                 pygame.quit()
                 sys.exit()
             
-                if event.type == pygame.FINGERDOWN:
-                    # 获取手指触屏的相对坐标并转换为像素坐标
-                    pos = (int(event.x * self.width), int(event.y * self.height))
-                else:
-                    pos = event.pos
+            elif event.type in TAP_EVENTS:
+                # 手指和鼠标统一成点击，同一次触摸的另一半事件被丢掉
+                tap = self.taps.feed(event, self.width, self.height, time.perf_counter())
+                if tap is None:
+                    continue
+                if self.tap_started is None:
+                    self.tap_started = tap.time
                 
                 if self.state == "menu":
-                    self.handle_menu_touch(pos)
+                    self.handle_menu_touch(tap.pos)
                 elif self.state == "playing":
-                    self.handle_game_touch(pos)
+                    self.handle_game_touch(tap.pos)
                 elif self.state == "won":
                     self.state = "menu"
+            
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                self.needs_full_redraw = True
+            
+            elif event.type in PAUSE_EVENTS:
+                self.save_game()
+        return bool(events)
     
     def handle_menu_touch(self, pos):
         """处理菜单触摸"""
-        difficulties = ["easy", "medium", "hard", "expert"]
-        button_height = 60
-        button_width = int(self.width * 0.7)
-        start_y = self.height // 3
-        
-        for i, diff in enumerate(difficulties):
-            btn_rect = pygame.Rect((self.width - button_width) // 2,
-                                   start_y + i * (button_height + 15),
-                                   button_width, button_height)
-            if btn_rect.collidepoint(pos):
-                self.new_game(diff)
+        hit = self.hit_map.menu_at(pos)
+        if hit is not None:
+            self.new_game(hit[1])
     
     def handle_game_touch(self, pos):
         """处理游戏触摸"""
-        # Check grid cells
-        if self.grid_x <= pos[0] < self.grid_x + self.grid_size and \
-           self.grid_y <= pos[1] < self.grid_y + self.grid_size:
-            col = (pos[0] - self.grid_x) // self.cell_size
-            row = (pos[1] - self.grid_y) // self.cell_size
-            if (row, col) not in self.fixed_cells:
-                self.selected_cell = (row, col)
+        hit = self.hit_map.game_at(pos)
+        if hit is None:
             return
+        kind, value = hit
         
-        # Check number pad
-        for btn in self.number_buttons:
-            if btn['rect'].collidepoint(pos):
-                if self.selected_cell:
-                    self.place_number(self.selected_cell[0], self.selected_cell[1], btn['number'])
-                return
-        
-        # Check control buttons
-        if self.delete_btn.collidepoint(pos):
+        if kind == 'cell':
+            if value not in self.fixed_cells:
+                self.selected_cell = value
+        elif kind == 'pad':
             if self.selected_cell:
-                self.place_number(self.selected_cell[0], self.selected_cell[1], 0)
-        elif self.hint_btn.collidepoint(pos):
+                if self.note_mode:
+                    self.toggle_note(self.selected_cell[0], self.selected_cell[1], value)
+                else:
+                    self.place_number(self.selected_cell[0], self.selected_cell[1], value)
+        elif value == 'delete':
+            if self.selected_cell:
+                row, col = self.selected_cell
+                if self.current_board[row, col]:
+                    self.place_number(row, col, 0)
+                else:
+                    self.set_notes(row * 9 + col, 0)
+        elif value == 'notes':
+            self.note_mode = not self.note_mode
+            self.needs_full_redraw = True
+        elif value == 'undo':
+            self.undo()
+        elif value == 'redo':
+            self.redo()
+        elif value == 'hint':
             self.get_hint()
-        elif self.check_btn.collidepoint(pos):
+        elif value == 'check':
             self.check_solution()
     
     def place_number(self, row, col, num):
-        """放置数字"""
+        """放置数字：连同被自动清掉的笔记算作一步，可整体撤销"""
         if (row, col) in self.fixed_cells:
             return
         
-        old_num = self.current_board[row][col]
-        self.history.append((row, col, old_num))
-        self.current_board[row][col] = num
+        old_num = self.current_board[row, col]
+        if old_num == num:
+            return
+        i = row * 9 + col
+        self.history.begin_group()
+        self.history.record(DIGIT, i, old_num, num)
+        self._set_digit(row, col, num)
+        if num:
+            for cell, old_marks in self.notes.cleanup(i, num):
+                self.history.record(NOTES, cell, old_marks, self.notes.marks[cell])
+        self.history.end_group()
+        self.mark_dirty()
+        
+        if self.board_state.is_complete():
+            self.state = "won"
+            self.elapsed_time = time.time() - self.start_time
+            if self.save_path:
+                import sudoku_save
+                sudoku_save.clear(self.save_path)
+            self.first_change = self.last_change = None
+    
+    def _set_digit(self, row, col, num):
+        """改写格子并增量更新冲突、候选（不记历史、不动笔记）"""
+        self.current_board[row, col] = num
         
         if (row, col) in self.errors:
             self.errors.remove((row, col))
         
-        if self.logic.check_complete(self.current_board):
-            self.state = "won"
-            self.elapsed_time = time.time() - self.start_time
+        # 增量冲突索引：只刷新受这次落子影响的格子
+        for cell in self.board_state.set(row, col, num):
+            if self.board_state.has_conflict(*cell):
+                self.errors.add(cell)
+            else:
+                self.errors.discard(cell)
+        
+        # 候选网格同样只动同行/列/宫的 20 个格子
+        self.candidates.set(row * 9 + col, num)
+    
+    def toggle_note(self, row, col, num):
+        """笔记模式下切换空格上的铅笔标记"""
+        if (row, col) in self.fixed_cells or self.current_board[row, col]:
+            return
+        i = row * 9 + col
+        self.set_notes(i, self.notes.marks[i] ^ (1 << (num - 1)))
+    
+    def set_notes(self, i, marks):
+        """改写格子 i 的笔记掩码并记入历史"""
+        old = self.notes.marks[i]
+        if old == marks:
+            return
+        self.history.record(NOTES, i, old, marks)
+        self.notes.marks[i] = marks
+        self.mark_dirty()
+    
+    def undo(self):
+        """撤销一步（提示、落子连同清掉的笔记都是整组还原）"""
+        self._apply_moves(self.history.undo(), undo=True)
+    
+    def redo(self):
+        self._apply_moves(self.history.redo(), undo=False)
+    
+    def _apply_moves(self, moves, undo):
+        for kind, cell, old, new in moves:
+            value = old if undo else new
+            if kind == DIGIT:
+                self._set_digit(cell // 9, cell % 9, value)
+                self.selected_cell = (cell // 9, cell % 9)
+            else:
+                self.notes.marks[cell] = value
+        if moves:
+            self.message = None
+            self.needs_full_redraw = True
+            self.mark_dirty()
+    
+    def mark_dirty(self):
+        """记录一次改动，交给 autosave 去抖后写盘"""
+        if self.save_path:
+            self.last_change = time.time()
+            if self.first_change is None:
+                self.first_change = self.last_change
+    
+    def autosave(self, now):
+        """停顿 AUTOSAVE_DELAY 秒或积压超过 AUTOSAVE_MAX_DELAY 秒时存档"""
+        if self.first_change is None:
+            return False
+        if now - self.last_change < AUTOSAVE_DELAY and now - self.first_change < AUTOSAVE_MAX_DELAY:
+            return False
+        return self.save_game()
+    
+    def snapshot(self):
+        import sudoku_save
+        undo, redo = self.history.export()
+        return sudoku_save.Snapshot(
+            self.difficulty, self.puzzle, self.solution, self.current_board, self.notes.marks,
+            undo, redo, time.time() - self.start_time)
+    
+    def save_game(self):
+        """立即存档（只在对局中），写盘失败不影响游戏"""
+        if not self.save_path or self.state != "playing":
+            return False
+        self.first_change = self.last_change = None
+        import sudoku_save
+        try:
+            sudoku_save.save(self.save_path, self.snapshot())
+        except OSError:
+            return False
+        return True
+    
+    def resume(self):
+        """从存档恢复对局，没有可用存档时返回 False"""
+        import sudoku_save
+        snap = sudoku_save.load(self.save_path)
+        if snap is None:
+            return False
+        self.difficulty = snap.difficulty
+        self.puzzle, self.solution = snap.puzzle, snap.solution
+        self.current_board = snap.board
+        self.board_state = BoardState(self.current_board)
+        self.candidates = self.logic.candidate_grid(self.current_board)
+        self.notes = PencilMarks()
+        self.notes.marks = list(snap.notes)
+        self.note_mode = False
+        self.message = None
+        self.fixed_cells = {(i // 9, i % 9) for i in range(81) if self.puzzle.cells[i]}
+        self.errors = {(i, j) for i in range(9) for j in range(9)
+                       if self.current_board[i, j] and self.board_state.has_conflict(i, j)}
+        self.history.load(snap.history, snap.redo)
+        self.selected_cell = None
+        self.start_time = time.time() - snap.elapsed
+        self.state = "playing"
+        self.needs_full_redraw = True
+        return True
     
     def get_hint(self):
-        """获取提示"""
-        row, col, num = self.logic.get_hint(self.current_board, self.solution)
-        if row is not None:
-            self.place_number(row, col, num)
+        """逻辑提示：填入最容易推出的一格并显示理由；盘面有错时只指出错处"""
+        from sudoku_hints import describe
+        hint = self.logic.find_hint(self.candidates, self.solution)
+        self.message = describe(hint, self.language) if hint else None
+        self.needs_full_redraw = True
+        if hint is None:
+            return
+        row, col = divmod(hint.cell, 9)
+        if (row, col) not in self.fixed_cells:
             self.selected_cell = (row, col)
+        if hint.technique not in ('conflict', 'mistake'):
+            self.place_number(row, col, hint.digit)
     
     def check_solution(self):
         """检查解答"""
-        self.errors = set()
-        for i in range(9):
-            for j in range(9):
-                if self.current_board[i][j] != 0:
-                    if self.current_board[i][j] != self.solution[i][j]:
-                        self.errors.add((i, j))
+        board, solution = self.current_board.cells, self.solution.cells
+        self.errors = {(i // 9, i % 9) for i in range(81) if board[i] and board[i] != solution[i]}
     
     def draw(self):
-        """极简绘图模式：只使用最基础的指令"""
+        """极简绘图模式：只使用最基础的指令，返回本帧是否更新了屏幕"""
+        if self.ui_manager is not None:
+            return self.draw_rich()
+        
+        if self.dirty_rects and not self.needs_full_redraw and self.state == self.drawn_state:
+            if self.state != "playing":
+                return False
+            rects = self.draw_game_dirty()
+            if rects:
+                self.present(rects)
+            return bool(rects)
+        
         self.screen.fill((10, 20, 30)) # 纯黑蓝底
         
         if self.state == "menu":
             # 绘制极简标题
-            text = self.title_font.render(self.texts['title'], True, (0, 255, 255))
-            rect = text.get_rect(center=(self.width // 2, self.height // 6))
-            self.screen.blit(text, rect)
+            self.glyphs.blit(self.screen, self.title_font, self.texts['title'], (0, 255, 255),
+                             (self.width // 2, self.height // 6))
             self.draw_menu_lite()
         elif self.state == "playing":
             self.draw_game_lite()
         
-        pygame.display.flip()
+        self.present()
+        self.needs_full_redraw = False
+        self.drawn_state = self.state
+        return True
 
+    def draw_rich(self):
+        """3D 界面：格子来自预渲染图集，每帧整屏重绘"""
+        self.screen.fill(BG_COLOR)
+        self.ui_manager.draw_particle_bg(pygame.time.get_ticks(), self.clock.get_rawtime())
+        if self.state == "menu":
+            self.draw_menu()
+        elif self.state == "playing":
+            self.draw_game()
+        elif self.state == "won":
+            self.draw_won()
+        self.present()
+        self.drawn_state = self.state
+        return True
+    
     def draw_menu_lite(self):
         """简单按钮绘制"""
-        difficulties = [("简单", "easy"), ("中等", "medium"), ("困难", "hard"), ("专家", "expert")]
-        btn_w, btn_h = int(self.width * 0.7), 60
-        for i, (label, diff) in enumerate(difficulties):
-            rect = pygame.Rect((self.width - btn_w) // 2, self.height // 3 + i * 80, btn_w, btn_h)
+        labels = {"easy": "简单", "medium": "中等", "hard": "困难", "expert": "专家"}
+        for rect, diff in self.menu_buttons:
+            label = labels[diff]
             pygame.draw.rect(self.screen, (30, 50, 80), rect) # 纯色块
             pygame.draw.rect(self.screen, (0, 200, 255), rect, 2) # 边框
-            t = self.cell_font.render(label, True, (255, 255, 255))
-            self.screen.blit(t, t.get_rect(center=rect.center))
+            self.glyphs.blit(self.screen, self.cell_font, label, (255, 255, 255), rect.center)
 
     def draw_game_lite(self):
         """简单棋盘绘制"""
@@ -288,24 +650,77 @@ class SudokuGameMobile:
         # 绘制格子
         for i in range(9):
             for j in range(9):
-                rect = pygame.Rect(self.grid_x + j * self.cell_size, self.grid_y + i * self.cell_size, 
-                                   self.cell_size, self.cell_size)
-                # 选中的格子变亮
-                color = (40, 60, 100) if self.selected_cell == (i, j) else (20, 30, 50)
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, (60, 80, 120), rect, 1)
-                
-                num = self.current_board[i][j]
-                if num != 0:
-                    c = (150, 200, 255) if (i, j) in self.fixed_cells else (255, 255, 255)
-                    t = self.cell_font.render(str(num), True, c)
-                    self.screen.blit(t, t.get_rect(center=rect.center))
+                self.cell_keys[i * 9 + j] = self._cell_key(i, j)
+                self.draw_cell_lite(i, j)
         
         # 绘制数字键
         for btn in self.number_buttons:
             pygame.draw.rect(self.screen, (30, 45, 70), btn['rect'])
-            t = self.cell_font.render(str(btn['number']), True, (255, 255, 255))
-            self.screen.blit(t, t.get_rect(center=btn['rect'].center))
+            self.glyphs.blit(self.screen, self.cell_font, str(btn['number']), (255, 255, 255),
+                             btn['rect'].center)
+        
+        # 功能按钮（笔记模式开启时高亮）
+        for rect, key in self.control_buttons():
+            active = key == 'notes' and self.note_mode
+            pygame.draw.rect(self.screen, (40, 90, 120) if active else (30, 45, 70), rect)
+            pygame.draw.rect(self.screen, (0, 200, 255), rect, 1)
+            self.glyphs.blit(self.screen, self.small_font, self.texts[key], (255, 255, 255), rect.center)
+        
+        if self.message:
+            self.glyphs.blit(self.screen, self.small_font, self.message, (255, 220, 120),
+                             self.message_pos())
+    
+    def message_pos(self):
+        return (self.width // 2, self.check_btn.bottom + 30)
+    
+    def control_buttons(self):
+        return [(getattr(self, key + '_btn'), key) for key in CONTROL_KEYS]
+    
+    def _cell_key(self, i, j):
+        """决定格子外观的全部状态：数字、选中、错误、固定、笔记"""
+        return (self.current_board.cells[i * 9 + j], self.selected_cell == (i, j),
+                (i, j) in self.errors, (i, j) in self.fixed_cells, self.notes.marks[i * 9 + j])
+    
+    def draw_cell_lite(self, i, j):
+        """绘制单个格子，返回其矩形"""
+        rect = pygame.Rect(self.grid_x + j * self.cell_size, self.grid_y + i * self.cell_size, 
+                           self.cell_size, self.cell_size)
+        # 选中的格子变亮
+        color = (40, 60, 100) if self.selected_cell == (i, j) else (20, 30, 50)
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.rect(self.screen, (60, 80, 120), rect, 1)
+        
+        num = self.current_board[i, j]
+        if num != 0:
+            if (i, j) in self.fixed_cells:
+                c = FIXED_COLOR
+            elif (i, j) in self.errors:
+                c = ERROR_COLOR
+            else:
+                c = USER_COLOR
+            self.glyphs.blit(self.screen, self.cell_font, str(num), c, rect.center)
+        elif self.notes.marks[i * 9 + j]:
+            self.draw_notes(rect, i * 9 + j)
+        return rect
+    
+    def draw_notes(self, rect, i):
+        """笔记按 3x3 小格排布：1 在左上，9 在右下"""
+        third = rect.width / 3
+        for num in self.notes.digits(i):
+            k = num - 1
+            center = (int(rect.x + third * (k % 3 + 0.5)), int(rect.y + third * (k // 3 + 0.5)))
+            self.glyphs.blit(self.screen, self.small_font, str(num), NOTE_COLOR, center)
+    
+    def draw_game_dirty(self):
+        """只重绘状态变化的格子，返回需要推送的矩形列表"""
+        rects = []
+        for i in range(9):
+            for j in range(9):
+                key = self._cell_key(i, j)
+                if self.cell_keys[i * 9 + j] != key:
+                    self.cell_keys[i * 9 + j] = key
+                    rects.append(self.draw_cell_lite(i, j))
+        return rects
     
     def draw_menu(self):
         """绘制菜单"""
@@ -317,22 +732,8 @@ class SudokuGameMobile:
                                      (self.width // 2, self.height // 4),
                                      self.small_font, (150, 200, 255), depth=2)
         
-        difficulties = [
-            (self.texts['easy'], "easy"),
-            (self.texts['medium'], "medium"),
-            (self.texts['hard'], "hard"),
-            (self.texts['expert'], "expert")
-        ]
-        
-        button_height = 60
-        button_width = int(self.width * 0.7)
-        start_y = self.height // 3
-        
-        for i, (label, diff) in enumerate(difficulties):
-            btn_rect = pygame.Rect((self.width - button_width) // 2,
-                                   start_y + i * (button_height + 15),
-                                   button_width, button_height)
-            self.ui_manager.draw_button(btn_rect, label, self.button_font, False)
+        for rect, diff in self.menu_buttons:
+            self.ui_manager.draw_button(rect, self.texts[diff], self.button_font, False)
     
     def draw_game(self):
         """绘制游戏界面"""
@@ -357,12 +758,13 @@ class SudokuGameMobile:
         self.draw_number_pad()
         
         # Control buttons
-        self.ui_manager.draw_button(self.delete_btn, self.texts['delete'],
-                                    self.small_font, False)
-        self.ui_manager.draw_button(self.hint_btn, self.texts['hint'],
-                                    self.small_font, False)
-        self.ui_manager.draw_button(self.check_btn, self.texts['check'],
-                                    self.small_font, False)
+        for rect, key in self.control_buttons():
+            self.ui_manager.draw_button(rect, self.texts[key], self.small_font, False,
+                                        key == 'notes' and self.note_mode)
+        
+        if self.message:
+            self.ui_manager.draw_3d_text(self.message, self.message_pos(),
+                                         self.small_font, (255, 220, 120), depth=1)
     
     def draw_grid(self):
         """绘制网格（自适应布局）"""
@@ -370,23 +772,18 @@ class SudokuGameMobile:
         
         # 阴影
         shadow_rect = pygame.Rect(self.grid_x + 3, self.grid_y + 3, self.grid_size, self.grid_size)
-        shadow_surf = pygame.Surface((self.grid_size, self.grid_size), pygame.SRCALPHA)
-        shadow_surf.fill((0, 0, 0, 80))
-        self.screen.blit(shadow_surf, shadow_rect.topleft)
+        self.ui_manager.draw_overlay(shadow_rect, (0, 0, 0, 80))
         
         self.ui_manager.draw_glass_rect(grid_rect, color=(15, 25, 40), alpha=240)
         
-        # 绘制格子
+        # 绘制格子（图集 + 一次批量 blits）
+        self.ui_manager.draw_cell_grid((self.grid_x, self.grid_y), self.cell_size,
+                                       self.cell_variants())
         for i in range(9):
             for j in range(9):
                 x = self.grid_x + j * self.cell_size
                 y = self.grid_y + i * self.cell_size
-                cell_rect = pygame.Rect(x, y, self.cell_size, self.cell_size)
-                
-                is_selected = self.selected_cell == (i, j)
-                self.ui_manager.draw_3d_cell(cell_rect, is_selected)
-                
-                num = self.current_board[i][j]
+                num = self.current_board[i, j]
                 if num != 0:
                     if (i, j) in self.fixed_cells:
                         color = (150, 200, 255)
@@ -397,6 +794,8 @@ class SudokuGameMobile:
                     
                     center_pos = (x + self.cell_size // 2, y + self.cell_size // 2)
                     self.ui_manager.draw_3d_number(num, center_pos, self.cell_font, color, depth=3)
+                elif self.notes.marks[i * 9 + j]:
+                    self.draw_notes(pygame.Rect(x, y, self.cell_size, self.cell_size), i * 9 + j)
         
         # 绘制网格线
         for i in range(10):
@@ -412,11 +811,38 @@ class SudokuGameMobile:
                            (self.grid_x + i * self.cell_size, self.grid_y),
                            (self.grid_x + i * self.cell_size, self.grid_y + self.grid_size), thickness)
     
+    def cell_variants(self):
+        """81 个格子的图集变体：选中 > 错误 > 固定 > 同行/列/宫高亮 > 普通"""
+        peers = set()
+        if self.selected_cell:
+            sr, sc = self.selected_cell
+            for k in range(9):
+                peers.add((sr, k))
+                peers.add((k, sc))
+                peers.add((sr // 3 * 3 + k // 3, sc // 3 * 3 + k % 3))
+        variants = []
+        for i in range(9):
+            for j in range(9):
+                cell = (i, j)
+                if cell == self.selected_cell:
+                    variants.append('selected')
+                elif cell in self.errors:
+                    variants.append('error')
+                elif cell in self.fixed_cells:
+                    variants.append('fixed')
+                elif cell in peers:
+                    variants.append('peer')
+                else:
+                    variants.append('normal')
+        return variants
+    
     def draw_number_pad(self):
         """绘制数字键盘"""
+        # 无头模式没有鼠标，不做悬停高亮
+        mouse = None if self.headless else pygame.mouse.get_pos()
         for btn in self.number_buttons:
             # Simple button style for numbers
-            color = (40, 60, 90) if btn['rect'].collidepoint(pygame.mouse.get_pos()) else (30, 45, 70)
+            color = (40, 60, 90) if mouse and btn['rect'].collidepoint(mouse) else (30, 45, 70)
             pygame.draw.rect(self.screen, color, btn['rect'])
             pygame.draw.rect(self.screen, (0, 200, 255), btn['rect'], 2)
             
@@ -429,9 +855,7 @@ class SudokuGameMobile:
         """绘制胜利画面"""
         self.draw_game()
         
-        overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
+        self.ui_manager.draw_overlay(self.screen.get_rect(), (0, 0, 0, 180))
         
         panel_rect = pygame.Rect(self.width // 10, self.height // 4,
                                  self.width * 4 // 5, self.height // 2)
@@ -455,12 +879,48 @@ class SudokuGameMobile:
                                     (self.width // 2, self.height * 2 // 3),
                                     self.small_font, (150, 150, 150), depth=1)
     
-    def run(self):
-        """主游戏循环"""
-        while True:
-            self.handle_input()
-            self.draw()
-            self.clock.tick(60)
+    def frame_done(self):
+        """一帧处理完：记录本帧第一次点击到画面推送完成的延迟"""
+        if self.tap_started is not None:
+            latency = (time.perf_counter() - self.tap_started) * 1000
+            self.tap_started = None
+            self.tap_latencies.append(latency)
+            if self.profiler:
+                self.profiler.record_tap(latency)
+    
+    def present(self, rects=None):
+        """把画面推到屏幕：rects 为空时整屏刷新，无头模式下什么都不做"""
+        if self.headless:
+            return
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+    
+    def run(self, max_frames=None):
+        """主游戏循环（max_frames 用于无头模式跑固定帧数）"""
+        frames = 0
+        while max_frames is None or frames < max_frames:
+            frames += 1
+            if self.profiler:
+                self.profiler.begin_frame()
+            had_input = self.handle_input()
+            drew = self.draw()
+            self.frame_done()
+            if self.profiler:
+                self.profiler.end_frame()
+                self.present([self.profiler.draw_overlay(self.screen, self.small_font)])
+            if frames == 1:
+                self.after_first_frame()
+            
+            # 一段时间没有输入也没有重绘，就降到空闲帧率
+            now = time.time()
+            if had_input or drew:
+                self.last_activity = now
+            self.autosave(now)
+            idle = now - self.last_activity >= IDLE_AFTER
+            if not self.headless:
+                self.clock.tick(IDLE_FPS if idle else ACTIVE_FPS)
 
 if __name__ == "__main__":
     import sys
@@ -3,6 +3,11 @@ Sudoku Mobile - SAFE MODE
 数独移动版 - 极简排错版
 """
 
+import time
+
+# 进程启动时刻，用来统计首帧耗时（要在导入 pygame 之前取）
+LAUNCH_TIME = time.perf_counter()
+
 import os
 import sys
 
@@ -24,8 +29,18 @@ def main():
         
         # 此时再导入剥离了复杂UI的游戏类
         from game_mobile import SudokuGameMobile
+        from sudoku_save import default_save_path
+        from sudoku_startup import default_cache_path
         
-        game = SudokuGameMobile(manual_screen=screen)
+        # SUDOKU_RICH_UI=1 时启用 3D 界面（格子走预渲染图集）
+        rich_ui = os.environ.get('SUDOKU_RICH_UI') == '1'
+        # SUDOKU_PROFILE=1 时显示帧耗时叠加层，退出时写出 trace 文件
+        profile = os.environ.get('SUDOKU_PROFILE') == '1'
+        # 进行中的对局保存在应用私有目录，启动时自动恢复；字体路径和布局缓存在同一目录
+        game = SudokuGameMobile(manual_screen=screen, rich_ui=rich_ui,
+                                profile=profile, trace_path="sudoku_trace.json",
+                                save_path=default_save_path(),
+                                startup_cache=default_cache_path(), launch_time=LAUNCH_TIME)
         game.run()
     except Exception as e:
         # 如果还是崩，这行字一定会救命
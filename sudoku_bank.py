@@ -0,0 +1,177 @@
+"""
+Sudoku Puzzle Bank
+离线题库：预生成、按技巧评级的唯一解谜题按难度分桶，定长二进制记录 + 内存映射读取
+
+文件格式（小端）：
+    头部 24 字节：b'SDKB' | 版本(1) | 记录长度(1) | 保留(2) | 4 个难度的题数(uint32 x4)
+    记录 52 字节：终盘 81 个数字按半字节打包(41) | 给定格位图 81 位(11)
+各难度的记录按 easy/medium/hard/expert 顺序连续存放。
+"""
+
+import mmap
+import os
+import random
+import struct
+import sys
+
+from sudoku_board import Board, flatten
+
+MAGIC = b'SDKB'
+VERSION = 1
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+HEADER = struct.Struct('<4sBBH4I')
+SOLUTION_BYTES = 41
+MASK_BYTES = 11
+RECORD_SIZE = SOLUTION_BYTES + MASK_BYTES
+
+DEFAULT_BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles.bank')
+
+
+def encode_record(puzzle, solution):
+    """把 (puzzle, solution) 打包成 52 字节记录"""
+    digits = list(flatten(solution)) + [0]
+    packed = bytearray(SOLUTION_BYTES)
+    for k in range(SOLUTION_BYTES):
+        packed[k] = (digits[2 * k] << 4) | digits[2 * k + 1]
+
+    mask = 0
+    for i, num in enumerate(flatten(puzzle)):
+        if num:
+            mask |= 1 << i
+    return bytes(packed) + mask.to_bytes(MASK_BYTES, 'little')
+
+
+def decode_record(record):
+    """把 52 字节记录还原成 (puzzle, solution) 两个 Board"""
+    digits = []
+    for byte in record[:SOLUTION_BYTES]:
+        digits.append(byte >> 4)
+        digits.append(byte & 0x0F)
+    mask = int.from_bytes(record[SOLUTION_BYTES:RECORD_SIZE], 'little')
+
+    solution = Board(bytes(digits[:81]))
+    puzzle = Board(bytes(num if mask >> i & 1 else 0 for i, num in enumerate(digits[:81])))
+    return puzzle, solution
+
+
+class PuzzleBank:
+    """只读题库：内存映射文件，按下标直接取记录，不解析整个文件"""
+
+    def __init__(self, path=DEFAULT_BANK_PATH):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"puzzle bank truncated: {path}")
+        magic, version, record_size, _, *counts = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"not a puzzle bank: {path}")
+
+        self.counts = dict(zip(DIFFICULTIES, counts))
+        self.offsets = {}
+        offset = HEADER.size
+        for diff in DIFFICULTIES:
+            self.offsets[diff] = offset
+            offset += self.counts[diff] * RECORD_SIZE
+        if len(self._map) < offset:
+            self.close()
+            raise ValueError(f"truncated puzzle bank: {path}")
+
+    def count(self, difficulty):
+        return self.counts.get(difficulty, 0)
+
+    def get(self, difficulty, index):
+        """读取某难度第 index 道题"""
+        if not 0 <= index < self.count(difficulty):
+            raise IndexError(index)
+        start = self.offsets[difficulty] + index * RECORD_SIZE
+        return decode_record(self._map[start:start + RECORD_SIZE])
+
+    def random(self, difficulty, rng=random):
+        """随机取一道题，该难度为空时返回 None"""
+        count = self.count(difficulty)
+        if not count:
+            return None
+        return self.get(difficulty, rng.randrange(count))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def build_bank(path, counts, logic=None, progress=None):
+    """批量生成唯一解谜题并写入题库，先写临时文件再原子替换
+
+    对称等价（规范形相同）的谜题只收一道，重复的重新生成。
+    """
+    from sudoku_canonical import CanonicalIndex
+    if logic is None:
+        from sudoku_logic import SudokuLogic
+        logic = SudokuLogic()
+
+    totals = [counts.get(diff, 0) for diff in DIFFICULTIES]
+    seen = CanonicalIndex(sum(totals))
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, *totals))
+            for diff, total in zip(DIFFICULTIES, totals):
+                for n in range(total):
+                    puzzle, solution = logic.generate_puzzle(diff, unique=True, graded=True)
+                    while not seen.add(puzzle):
+                        puzzle, solution = logic.generate_puzzle(diff, unique=True, graded=True)
+                    f.write(encode_record(puzzle, solution))
+                    if progress:
+                        progress(diff, n + 1, total)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # 出错或中断时不留半个临时文件，已有的题库保持不变
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="批量生成离线数独题库")
+    parser.add_argument('output', nargs='?', default=DEFAULT_BANK_PATH, help="题库文件路径")
+    parser.add_argument('-n', '--count', type=int, default=500, help="每个难度的题数")
+    for diff in DIFFICULTIES:
+        parser.add_argument(f'--{diff}', type=int, help=f"{diff} 难度的题数（覆盖 -n）")
+    parser.add_argument('--seed', type=int, help="随机种子")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    counts = {diff: getattr(args, diff) if getattr(args, diff) is not None else args.count
+              for diff in DIFFICULTIES}
+
+    def progress(diff, done, total):
+        if done == total or done % 100 == 0:
+            print(f"{diff}: {done}/{total}", file=sys.stderr)
+
+    start = time.perf_counter()
+    build_bank(args.output, counts, progress=progress)
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"wrote {total} puzzles to {args.output} in {elapsed:.1f}s "
+          f"({total * RECORD_SIZE + HEADER.size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
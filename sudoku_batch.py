@@ -0,0 +1,212 @@
+"""
+Sudoku Batch Generator
+多核批量生成数独谜题（无需 pygame）
+
+    python sudoku_batch.py -n 10000 -o puzzles.txt
+    python sudoku_batch.py -n 10000 -o puzzles.bank --seed 42 --jobs 8
+
+任务按 (难度, 块号) 切分，每块用 "种子:难度:块号" 派生独立的随机源，
+所以同一个种子无论用几个进程，生成的题目都完全相同。
+块内对称等价（规范形相同）的题会重新生成；跨块的等价题只统计不剔除，
+剔除会打乱 .bank 的按块定位。
+结果一完成就写盘：.bank 输出按块号定位写入（字节级可复现），
+其它输出为每行 "难度 谜题81位 终盘81位" 的文本（行序随完成顺序变化）。
+"""
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from sudoku_logic import SudokuLogic
+from sudoku_canonical import CanonicalIndex, fingerprint
+from sudoku_bank import DIFFICULTIES, HEADER, MAGIC, RECORD_SIZE, VERSION, decode_record, encode_record
+
+
+def generate_chunk(difficulty, seed, chunk_index, count, unique=True, graded=True):
+    """工作进程：用派生种子生成一块谜题，返回编码后的记录列表和规范形指纹"""
+    rng = random.Random(f"{seed}:{difficulty}:{chunk_index}")
+    logic = SudokuLogic(rng=rng)
+    seen = CanonicalIndex(count)
+    records = []
+    fingerprints = []
+    while len(records) < count:
+        puzzle, solution = logic.generate_puzzle(difficulty, unique=unique, graded=graded and unique)
+        value = fingerprint(puzzle)
+        if not seen.add_fingerprint(value):
+            continue
+        records.append(encode_record(puzzle, solution))
+        fingerprints.append(value)
+    return difficulty, chunk_index, records, fingerprints
+
+
+def plan_chunks(counts, chunk_size):
+    """把每个难度的题数切成 (难度, 块号, 数量) 任务"""
+    tasks = []
+    for diff in DIFFICULTIES:
+        total = counts.get(diff, 0)
+        for chunk_index, start in enumerate(range(0, total, chunk_size)):
+            tasks.append((diff, chunk_index, min(chunk_size, total - start)))
+    return tasks
+
+
+class _TextWriter:
+    """文件输出先写临时文件，commit 后才替换目标（标准输出直接写）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = None if path == '-' else path + '.tmp'
+        self.file = sys.stdout if path == '-' else open(self.tmp_path, 'w')
+        self.committed = False
+
+    def write(self, difficulty, chunk_index, records):
+        lines = []
+        for record in records:
+            puzzle, solution = decode_record(record)
+            lines.append("%s %s %s\n" % (
+                difficulty,
+                puzzle.to_string(), solution.to_string()))
+        self.file.writelines(lines)
+        self.file.flush()
+
+    def commit(self):
+        if self.tmp_path is not None:
+            self.file.close()
+            os.replace(self.tmp_path, self.path)
+        self.committed = True
+
+    def close(self):
+        """没有 commit 就结束（出错或中断）时丢掉临时文件，不覆盖已有输出"""
+        if self.file is not sys.stdout:
+            self.file.close()
+        if not self.committed and self.tmp_path is not None:
+            _remove(self.tmp_path)
+
+
+class _BankWriter:
+    """按块号直接定位写入题库文件，完成顺序不影响结果"""
+
+    def __init__(self, path, counts, chunk_size):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.chunk_size = chunk_size
+        totals = [counts.get(diff, 0) for diff in DIFFICULTIES]
+        self.offsets = {}
+        offset = HEADER.size
+        for diff, total in zip(DIFFICULTIES, totals):
+            self.offsets[diff] = offset
+            offset += total * RECORD_SIZE
+        self.file = open(self.tmp_path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, *totals))
+        self.committed = False
+
+    def write(self, difficulty, chunk_index, records):
+        self.file.seek(self.offsets[difficulty] + chunk_index * self.chunk_size * RECORD_SIZE)
+        self.file.write(b''.join(records))
+
+    def commit(self):
+        """所有块都写完后才发布：未完成的块是全 0 空洞，会被解码成全 0 的谜题"""
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        self.committed = True
+
+    def close(self):
+        self.file.close()
+        if not self.committed:
+            _remove(self.tmp_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def run_batch(counts, output, jobs=None, seed=0, chunk_size=50, unique=True, graded=True,
+              report=None):
+    """并行生成并流式写盘，返回 (总题数, 耗时秒, 跨块等价题数)"""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    jobs = jobs or os.cpu_count() or 1
+    tasks = plan_chunks(counts, chunk_size)
+    total = sum(count for _, _, count in tasks)
+    if output.endswith('.bank'):
+        writer = _BankWriter(output, counts, chunk_size)
+    else:
+        writer = _TextWriter(output)
+
+    seen = CanonicalIndex(total)
+    duplicates = 0
+    done = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending = set()
+            task_iter = iter(tasks)
+            while True:
+                # 在途任务数量有上限，结果不会在内存里堆积
+                while len(pending) < jobs * 2:
+                    task = next(task_iter, None)
+                    if task is None:
+                        break
+                    diff, chunk_index, count = task
+                    pending.add(pool.submit(generate_chunk, diff, seed, chunk_index, count,
+                                            unique, graded))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    diff, chunk_index, records, fingerprints = future.result()
+                    writer.write(diff, chunk_index, records)
+                    for value in fingerprints:
+                        if not seen.add_fingerprint(value):
+                            duplicates += 1
+                    done += len(records)
+                    if report:
+                        report(done, total, time.perf_counter() - start)
+        writer.commit()
+    finally:
+        writer.close()
+    return done, time.perf_counter() - start, duplicates
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="多核批量生成数独谜题")
+    parser.add_argument('-n', '--count', type=int, default=1000, help="每个难度的题数")
+    parser.add_argument('-d', '--difficulty', action='append', choices=DIFFICULTIES,
+                        help="只生成指定难度（可重复）")
+    parser.add_argument('-o', '--output', default='-', help="输出文件（.bank 为二进制题库，- 为标准输出）")
+    parser.add_argument('-j', '--jobs', type=int, help="进程数（默认 CPU 核数）")
+    parser.add_argument('--seed', type=int, default=0, help="基础随机种子")
+    parser.add_argument('--chunk', type=int, default=50, help="每个任务的题数")
+    parser.add_argument('--no-unique', action='store_true', help="不校验唯一解（同时不评级）")
+    parser.add_argument('--no-grade', action='store_true', help="不按解题技巧评级")
+    args = parser.parse_args(argv)
+    if args.chunk < 1:
+        parser.error("--chunk must be at least 1")
+
+    counts = {diff: args.count for diff in (args.difficulty or DIFFICULTIES)}
+
+    last = [0.0]
+
+    def report(done, total, elapsed):
+        if done == total or elapsed - last[0] >= 1.0:
+            last[0] = elapsed
+            print(f"{done}/{total} puzzles, {done / elapsed:.1f} puzzles/sec", file=sys.stderr)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    done, elapsed, duplicates = run_batch(counts, args.output, jobs, args.seed, args.chunk,
+                              not args.no_unique, not args.no_grade, report)
+    print(f"generated {done} puzzles in {elapsed:.2f}s with {jobs} workers: "
+          f"{done / elapsed:.1f} puzzles/sec", file=sys.stderr)
+    if duplicates:
+        print(f"warning: {duplicates} puzzles are symmetric variants of earlier chunks",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
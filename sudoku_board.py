@@ -0,0 +1,155 @@
+"""
+Sudoku Board
+扁平棋盘：81 字节 bytearray，格子按 0..80 编号（index = row * 9 + col）
+
+board[row, col] 直接读写单格；board[row][col] 经由行视图兼容旧的二维列表写法。
+各模块的行/列/宫/同伴下标表也放在这里。
+"""
+
+ROW_OF = tuple(i // 9 for i in range(81))
+COL_OF = tuple(i % 9 for i in range(81))
+BOX_OF = tuple((i // 27) * 3 + (i % 9) // 3 for i in range(81))
+CELL_UNITS = tuple(zip(ROW_OF, COL_OF, BOX_OF))
+
+ROWS = tuple(tuple(r * 9 + c for c in range(9)) for r in range(9))
+COLS = tuple(tuple(r * 9 + c for r in range(9)) for c in range(9))
+BOXES = tuple(tuple(((b // 3) * 3 + k // 3) * 9 + (b % 3) * 3 + k % 3 for k in range(9))
+              for b in range(9))
+UNITS = ROWS + COLS + BOXES
+PEERS = tuple(tuple(sorted(set(ROWS[ROW_OF[i]] + COLS[COL_OF[i]] + BOXES[BOX_OF[i]]) - {i}))
+              for i in range(81))
+
+
+def flatten(board):
+    """Board / 二维列表 / 81 个数字的序列 -> 可按 0..80 下标读取的序列（尽量不复制）"""
+    if isinstance(board, Board):
+        return board.cells
+    if isinstance(board, (bytes, bytearray)) or len(board) == 81:
+        return board
+    return [num for row in board for num in row]
+
+
+class Board:
+    __slots__ = ('cells',)
+
+    def __init__(self, cells=None):
+        """cells 可以是 Board、二维列表、81 个数字的序列或字节串；总是复制一份"""
+        if cells is None:
+            self.cells = bytearray(81)
+        else:
+            self.cells = bytearray(flatten(cells))
+            if len(self.cells) != 81:
+                raise ValueError("a board has 81 cells")
+
+    @classmethod
+    def from_string(cls, text):
+        """81 位字符串（. 或 0 为空格）"""
+        return cls(bytes(0 if ch in '.0' else int(ch) for ch in text.strip()))
+
+    def copy(self):
+        other = Board.__new__(Board)
+        other.cells = self.cells[:]
+        return other
+
+    def to_bytes(self):
+        """只读的零拷贝视图，可直接写文件或做哈希"""
+        return memoryview(self.cells).toreadonly()
+
+    def key(self):
+        """不可变的字节串，可作字典键"""
+        return bytes(self.cells)
+
+    def to_rows(self):
+        cells = self.cells
+        return [list(cells[r * 9:r * 9 + 9]) for r in range(9)]
+
+    def to_string(self):
+        return ''.join(map(str, self.cells))
+
+    def filled(self):
+        return 81 - self.cells.count(0)
+
+    # ---- 兼容二维列表 ----
+
+    def __getitem__(self, key):
+        if type(key) is tuple:
+            return self.cells[key[0] * 9 + key[1]]
+        if not -9 <= key < 9:
+            raise IndexError("board row out of range")
+        return BoardRow(self.cells, (key % 9) * 9)
+
+    def __setitem__(self, key, value):
+        if type(key) is tuple:
+            self.cells[key[0] * 9 + key[1]] = value
+        else:
+            BoardRow(self.cells, (key % 9) * 9)[:] = value
+
+    def __len__(self):
+        return 9
+
+    def __iter__(self):
+        cells = self.cells
+        for base in range(0, 81, 9):
+            yield BoardRow(cells, base)
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.cells == other.cells
+        try:
+            return self.cells == bytearray(flatten(other))
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Board({self.to_string()!r})"
+
+
+class BoardRow:
+    """一行的视图：读写直接落到棋盘的 bytearray 上"""
+
+    __slots__ = ('cells', 'base')
+
+    def __init__(self, cells, base):
+        self.cells = cells
+        self.base = base
+
+    def __getitem__(self, col):
+        if type(col) is slice:
+            return list(self.cells[self.base:self.base + 9][col])
+        if not -9 <= col < 9:
+            raise IndexError("board column out of range")
+        return self.cells[self.base + col % 9]
+
+    def __setitem__(self, col, value):
+        if type(col) is slice:
+            row = list(self.cells[self.base:self.base + 9])
+            row[col] = value
+            if len(row) != 9:
+                raise ValueError("a board row has 9 cells")
+            self.cells[self.base:self.base + 9] = bytes(row)
+        else:
+            if not -9 <= col < 9:
+                raise IndexError("board column out of range")
+            self.cells[self.base + col % 9] = value
+
+    def __len__(self):
+        return 9
+
+    def __iter__(self):
+        return iter(self.cells[self.base:self.base + 9])
+
+    def __contains__(self, num):
+        return num in self.cells[self.base:self.base + 9]
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
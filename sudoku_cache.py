@@ -0,0 +1,128 @@
+"""
+Sudoku Render Caches
+渲染缓存：文字字形、渐变按钮、玻璃面板和遮罩预合成，重复帧直接 blit
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+def _brighten(color, amount):
+    return tuple(min(255, c + amount) for c in color)
+
+
+class GlyphCache:
+    """字形缓存：(字体, 文本, 颜色, 效果) -> 合成好的单张 Surface，LRU 淘汰"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, effect='plain', depth=0, glow_color=None):
+        """返回以文字中心对齐的 Surface，效果层已全部合成"""
+        key = (font, text, tuple(color), effect, depth, glow_color)
+        surf = self._cache.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        surf = self._compose(font, text, tuple(color), effect, depth, glow_color)
+        self._cache[key] = surf
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return surf
+
+    def blit(self, screen, font, text, color, center, effect='plain', depth=0, glow_color=None):
+        """渲染（或取缓存）并居中绘制到 screen，返回绘制矩形"""
+        surf = self.render(font, text, color, effect, depth, glow_color)
+        return screen.blit(surf, surf.get_rect(center=center))
+
+    def clear(self):
+        """字体缩放变化时调用，丢弃全部字形"""
+        self._cache.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache),
+                'max_size': self.max_size}
+
+    def _compose(self, font, text, color, effect, depth, glow_color):
+        if effect == 'plain':
+            return font.render(text, True, color)
+
+        # 每层：(x 偏移, y 偏移, 颜色, 透明度)，从下往上叠
+        if effect == '3d_number':
+            highlight = tuple(min(255, int(c * 1.3)) for c in color)
+            layers = [(i * 2, i * 2, (0, 0, 0), 150 - i * 30) for i in range(depth, 0, -1)]
+            layers += [(dx, dy, (0, 0, 0), 150)
+                       for dx, dy in ((-1, -1), (-1, 1), (1, -1), (1, 1), (-2, 0), (2, 0), (0, -2), (0, 2))]
+            layers += [(0, 0, color, 255), (-1, -1, highlight, 120)]
+        elif effect == '3d_text':
+            layers = [(i, i, (0, 0, 0), 100 - i * 20) for i in range(depth, 0, -1)]
+            layers += [(0, 0, color, 255), (-1, -1, _brighten(color, 60), 80)]
+        elif effect == 'neon':
+            if glow_color is None:
+                glow_color = tuple(max(0, c - 100) for c in color)
+            layers = [(-i, -i, glow_color, 50 * i) for i in range(3, 0, -1)]
+            layers += [(0, 0, color, 255)]
+        else:
+            raise ValueError(f"unknown glyph effect: {effect}")
+
+        # 同色的层只渲染一次
+        rendered = {}
+        for _, _, layer_color, _ in layers:
+            if layer_color not in rendered:
+                rendered[layer_color] = font.render(text, True, layer_color)
+
+        pad = max(max(abs(dx), abs(dy)) for dx, dy, _, _ in layers)
+        w, h = rendered[color].get_size()
+        surf = pygame.Surface((w + pad * 2, h + pad * 2), pygame.SRCALPHA)
+        for dx, dy, layer_color, alpha in layers:
+            layer = rendered[layer_color]
+            layer.set_alpha(None if alpha >= 255 else max(0, alpha))
+            surf.blit(layer, (pad + dx, pad + dy))
+        return surf
+
+
+class SurfaceCache:
+    """面板/按钮/遮罩缓存：(类型, 尺寸, 配色, 状态) -> Surface
+
+    屏幕尺寸变化时自动整体作废，布局变化时调用 clear()。
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self.screen_size = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build, screen_size=None):
+        """取缓存，没有就调用 build() 生成并保存"""
+        if screen_size is not None and screen_size != self.screen_size:
+            self._cache.clear()
+            self.screen_size = screen_size
+
+        surf = self._cache.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        surf = build()
+        self._cache[key] = surf
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache),
+                'max_size': self.max_size}
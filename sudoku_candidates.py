@@ -0,0 +1,126 @@
+"""
+Sudoku Candidate Grid
+候选数网格：每格一个 9 位候选掩码，落子时只更新 20 个同行/列/宫的格子
+笔记（铅笔标记）：玩家手动记的候选，落子时自动从同伴格子里划掉
+"""
+
+from sudoku_board import Board, CELL_UNITS, PEERS, flatten
+from sudoku_solver import ALL_DIGITS, BIT, DIGITS_OF
+
+
+class CandidateGrid:
+    def __init__(self, board=None):
+        self.cells = [0] * 81
+        self.cands = [ALL_DIGITS] * 81
+        self.empty = 81
+        if board is not None:
+            for i, num in enumerate(flatten(board)):
+                if num:
+                    self.place(i, num)
+
+    def copy(self):
+        other = CandidateGrid.__new__(CandidateGrid)
+        other.cells = self.cells[:]
+        other.cands = self.cands[:]
+        other.empty = self.empty
+        return other
+
+    def place(self, i, num):
+        """在格子 i 填入 num，并从所有同伴格子的候选中划掉它"""
+        bit = BIT[num]
+        cands = self.cands
+        self.cells[i] = num
+        cands[i] = 0
+        self.empty -= 1
+        for p in PEERS[i]:
+            cands[p] &= ~bit
+
+    def erase(self, i):
+        """清空格子 i，重算它和同伴空格的候选（只看已填数字，之前的排除不保留）"""
+        cells = self.cells
+        if not cells[i]:
+            return
+        cells[i] = 0
+        self.empty += 1
+        cands = self.cands
+        for p in (i,) + PEERS[i]:
+            if not cells[p]:
+                used = 0
+                for q in PEERS[p]:
+                    used |= BIT[cells[q]]
+                cands[p] = ALL_DIGITS & ~used
+
+    def set(self, i, num):
+        """改写格子 i（num 为 0 表示清空），可覆盖已有数字"""
+        if self.cells[i]:
+            self.erase(i)
+        if num:
+            self.place(i, num)
+
+    def eliminate(self, i, mask):
+        """从格子 i 的候选中划掉 mask，返回是否有变化"""
+        before = self.cands[i]
+        self.cands[i] = before & ~mask
+        return before != self.cands[i]
+
+    def candidates(self, i):
+        """格子 i 的候选数字元组"""
+        return DIGITS_OF[self.cands[i]]
+
+    def is_consistent(self):
+        """没有空格失去全部候选，且已填数字互不冲突"""
+        rows = [0] * 9
+        cols = [0] * 9
+        boxes = [0] * 9
+        for i, num in enumerate(self.cells):
+            if not num:
+                if not self.cands[i]:
+                    return False
+                continue
+            r, c, b = CELL_UNITS[i]
+            bit = BIT[num]
+            if (rows[r] | cols[c] | boxes[b]) & bit:
+                return False
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+        return True
+
+    def to_board(self):
+        return Board(self.cells)
+
+
+class PencilMarks:
+    """玩家笔记：每格一个 9 位掩码，与自动候选分开保存"""
+
+    def __init__(self):
+        self.marks = [0] * 81
+
+    def toggle(self, i, num):
+        """切换格子 i 上的笔记 num"""
+        self.marks[i] ^= BIT[num]
+
+    def clear(self, i):
+        self.marks[i] = 0
+
+    def cleanup(self, i, num):
+        """格子 i 填入 num 后：清掉该格笔记，并从同伴格子的笔记里划掉 num
+
+        返回有变化的 [(格子, 原掩码), ...]，供撤销记录。
+        """
+        marks = self.marks
+        bit = BIT[num]
+        changed = [(i, marks[i])] if marks[i] else []
+        marks[i] = 0
+        for p in PEERS[i]:
+            if marks[p] & bit:
+                changed.append((p, marks[p]))
+                marks[p] &= ~bit
+        return changed
+
+    def fill(self, grid):
+        """用候选网格填满所有空格的笔记"""
+        self.marks = [0 if num else cands for num, cands in zip(grid.cells, grid.cands)]
+
+    def digits(self, i):
+        return DIGITS_OF[self.marks[i]]
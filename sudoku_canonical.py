@@ -0,0 +1,176 @@
+"""
+Sudoku Canonical Form
+规范形：把谜题在对称群（数字重编号、带/栈/行/列换位、转置）下的所有等价变体映射到同一个代表
+
+代表取变换后字典序最小的那一个，比较时先比给定格的位置图样（空格在前），图样相同再比
+按首次出现重新编号的数字。图样部分逐行贪心：列的安排用有序划分表示，每放一行就把
+每个列块拆成“这行为空的列 + 有数字的列”，不用枚举列排列；行的选择只保留当前前缀
+最小的分支。只有图样完全相同的分支才会展开剩下的列排列去比数字。
+
+解完的终盘没有空格可区分，会退化成穷举，只用于谜题。
+"""
+
+from array import array
+from hashlib import blake2b
+from itertools import permutations, product
+
+from sudoku_board import Board, flatten
+from sudoku_solver import POPCOUNT
+
+# 列用 9 位掩码表示（第 c 位是第 c 列），三个栈的初始顺序各有 6 种
+_STACKS = (0b000000111, 0b000111000, 0b111000000)
+_STACK_ORDERS = tuple(tuple(_STACKS[k] for k in order) for order in permutations(range(3)))
+_BAND_ROWS = ((0, 1, 2), (3, 4, 5), (6, 7, 8))
+
+
+def _row_masks(cells, transpose):
+    masks = []
+    for r in range(9):
+        mask = 0
+        for c in range(9):
+            if cells[c * 9 + r] if transpose else cells[r * 9 + c]:
+                mask |= 1 << c
+        masks.append(mask)
+    return masks
+
+
+def _fit(mask, colsets):
+    """一行在当前列划分下能排出的最小图样值，以及拆分后的划分"""
+    value = 0
+    refined = []
+    for cols in colsets:
+        ones = mask & cols
+        zeros = cols ^ ones
+        value = (value << POPCOUNT[cols]) | ((1 << POPCOUNT[ones]) - 1)
+        if zeros:
+            refined.append(zeros)
+        if ones:
+            refined.append(ones)
+    return value, tuple(refined)
+
+
+def _candidates(rows):
+    """下一行可选的原始行：新的一带可以是任何没用过的带，否则只能是当前带剩下的行"""
+    if len(rows) % 3 == 0:
+        used = {r // 3 for r in rows}
+        return [r for band in range(3) if band not in used for r in _BAND_ROWS[band]]
+    return [r for r in _BAND_ROWS[rows[-1] // 3] if r not in rows]
+
+
+def _column_orders(colsets):
+    """把划分里剩下的并列列块展开成具体的列顺序"""
+    blocks = [[c for c in range(9) if cols >> c & 1] for cols in colsets]
+    for choice in product(*(permutations(block) for block in blocks)):
+        yield [c for block in choice for c in block]
+
+
+def canonical_key(board):
+    """81 字节的规范形，等价的谜题得到同一个字节串"""
+    cells = flatten(board)
+    masks = (_row_masks(cells, False), _row_masks(cells, True))
+    states = [(t, (), colsets) for t in (0, 1) for colsets in _STACK_ORDERS]
+
+    # 图样：逐行保留前缀最小的分支
+    for _ in range(9):
+        best = None
+        survivors = []
+        fits = {}
+        for t, rows, colsets in states:
+            row_masks = masks[t]
+            for r in _candidates(rows):
+                key = (row_masks[r], colsets)
+                fit = fits.get(key)
+                if fit is None:
+                    fit = fits[key] = _fit(*key)
+                if best is None or fit[0] < best:
+                    best = fit[0]
+                    survivors = [(t, rows + (r,), fit[1])]
+                elif fit[0] == best:
+                    survivors.append((t, rows + (r,), fit[1]))
+        states = survivors
+
+    # 数字：图样相同的分支里取重新编号后最小的
+    best = None
+    for t, rows, colsets in states:
+        for cols in _column_orders(colsets):
+            if t:
+                order = [c * 9 + r for r in rows for c in cols]
+            else:
+                order = [r * 9 + c for r in rows for c in cols]
+            labels = [0] * 10
+            digits = bytearray(81)
+            next_label = 1
+            for k, i in enumerate(order):
+                num = cells[i]
+                if num:
+                    if not labels[num]:
+                        labels[num] = next_label
+                        next_label += 1
+                    digits[k] = labels[num]
+            if best is None or digits < best:
+                best = digits
+    return bytes(best)
+
+
+def canonical_form(board):
+    """规范形的 Board"""
+    return Board(canonical_key(board))
+
+
+def fingerprint(board):
+    """规范形的 64 位指纹（非 0），供 CanonicalIndex 使用"""
+    value = int.from_bytes(blake2b(canonical_key(board), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+class CanonicalIndex:
+    """“见过没有”的集合：开放寻址哈希表，每个槽只存一个 64 位指纹
+
+    0 表示空槽，线性探测，装载率超过 2/3 时容量翻倍；每道题约 12 字节。
+    不同谜题指纹相同的概率约为 n / 2^64，可以忽略。
+    """
+
+    def __init__(self, capacity=1024):
+        size = 16
+        while size * 2 < capacity * 3:
+            size *= 2
+        self.slots = array('Q', bytes(8 * size))
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, board):
+        return self.has_fingerprint(fingerprint(board))
+
+    def add(self, board):
+        """记下一道谜题，以前没见过（含等价变体）时返回 True"""
+        return self.add_fingerprint(fingerprint(board))
+
+    def _slot(self, value):
+        slots = self.slots
+        mask = len(slots) - 1
+        i = value & mask
+        while slots[i] and slots[i] != value:
+            i = (i + 1) & mask
+        return i
+
+    def has_fingerprint(self, value):
+        return self.slots[self._slot(value)] == value
+
+    def add_fingerprint(self, value):
+        i = self._slot(value)
+        if self.slots[i] == value:
+            return False
+        self.slots[i] = value
+        self.count += 1
+        if self.count * 3 > len(self.slots) * 2:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self.slots
+        self.slots = array('Q', bytes(16 * len(old)))
+        for value in old:
+            if value:
+                self.slots[self._slot(value)] = value
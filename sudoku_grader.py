@@ -0,0 +1,417 @@
+"""
+Sudoku Difficulty Grader
+数独难度评级：按人类解题技巧逐步求解，记录最难技巧和总分
+"""
+
+from collections import namedtuple
+from itertools import combinations
+
+from sudoku_board import flatten
+from sudoku_candidates import CandidateGrid
+from sudoku_solver import BIT, BOX_OF, COL_OF, DIGIT_OF_BIT, PEERS, POPCOUNT, ROW_OF, UNITS
+
+# 一步推理：填数步骤有 cell/digit，删减步骤有 eliminations=((格子, 掩码), ...)
+Step = namedtuple('Step', 'technique cell digit eliminations unit')
+# choices 是平均每一步有几个格子能直接用唯一法填出，越少越难找到下一步；
+# 只统计用到比唯一法更难的技巧之前的步骤，那之后分级只看技巧
+Grade = namedtuple('Grade', 'technique score steps solved choices')
+
+# 技巧按难度从低到高排列：(名称, 每步分值)
+TECHNIQUES = (
+    ('hidden_single', 1),
+    ('naked_single', 2),
+    ('pointing', 5),
+    ('claiming', 5),
+    ('naked_pair', 8),
+    ('hidden_pair', 10),
+    ('naked_triple', 12),
+    ('hidden_triple', 14),
+    ('x_wing', 20),
+    ('swordfish', 25),
+    ('xy_wing', 25),
+    ('simple_coloring', 30),
+    ('backtracking', 100),
+)
+TECHNIQUE_LEVEL = {name: level for level, (name, _) in enumerate(TECHNIQUES)}
+TECHNIQUE_SCORE = dict(TECHNIQUES)
+
+# 难度区间：(最难技巧下限, 最难技巧上限, 平均可填格数下限, 平均可填格数上限)
+# 只靠唯一法的题再按技巧组合分：只用隐性唯一、每步都有很多格子可填的算简单，
+# 要用显性唯一或者每步可填的格子少的算中等
+DIFFICULTY_BANDS = {
+    'easy': ('hidden_single', 'hidden_single', 12, None),
+    'medium': ('hidden_single', 'naked_single', 0, 11),
+    'hard': ('pointing', 'hidden_triple', 0, None),
+    'expert': ('x_wing', 'backtracking', 0, None),
+}
+
+# 找隐性唯一时先看宫，再看行列（更接近人的观察顺序）
+UNIT_SEARCH_ORDER = tuple(range(18, 27)) + tuple(range(0, 18))
+BOX_UNIT_BASE = 18
+COL_UNIT_BASE = 9
+
+
+def unit_name(unit):
+    """单元编号 -> ('row'|'col'|'box', 1..9)"""
+    if unit >= BOX_UNIT_BASE:
+        return 'box', unit - BOX_UNIT_BASE + 1
+    if unit >= COL_UNIT_BASE:
+        return 'col', unit - COL_UNIT_BASE + 1
+    return 'row', unit + 1
+
+
+def _positions(grid, unit, bit):
+    """单元内候选含 bit 的格子列表"""
+    cands = grid.cands
+    return [i for i in UNITS[unit] if cands[i] & bit]
+
+
+def _eliminations(grid, cells, mask, keep=()):
+    """cells 中（排除 keep）真正含 mask 候选的格子"""
+    cands = grid.cands
+    return tuple((i, cands[i] & mask) for i in cells if i not in keep and cands[i] & mask)
+
+
+def find_hidden_single(grid):
+    cells = grid.cells
+    cands = grid.cands
+    for u in UNIT_SEARCH_ORDER:
+        once = twice = 0
+        for i in UNITS[u]:
+            if not cells[i]:
+                mask = cands[i]
+                twice |= once & mask
+                once |= mask
+        hidden = once & ~twice
+        if hidden:
+            bit = hidden & -hidden
+            for i in UNITS[u]:
+                if cands[i] & bit:
+                    return Step('hidden_single', i, DIGIT_OF_BIT[bit], (), u)
+    return None
+
+
+def find_naked_single(grid):
+    cells = grid.cells
+    cands = grid.cands
+    for i in range(81):
+        if not cells[i] and POPCOUNT[cands[i]] == 1:
+            return Step('naked_single', i, DIGIT_OF_BIT[cands[i]], (), BOX_UNIT_BASE + BOX_OF[i])
+    return None
+
+
+def find_pointing(grid):
+    """宫内某数字只出现在一行/一列，划掉该行/列宫外的候选"""
+    for b in range(9):
+        box = BOX_UNIT_BASE + b
+        for num in range(1, 10):
+            bit = BIT[num]
+            pos = _positions(grid, box, bit)
+            if len(pos) < 2:
+                continue
+            for line_of, base in ((ROW_OF, 0), (COL_OF, COL_UNIT_BASE)):
+                line = line_of[pos[0]]
+                if all(line_of[i] == line for i in pos):
+                    elims = _eliminations(grid, UNITS[base + line], bit, pos)
+                    if elims:
+                        return Step('pointing', None, num, elims, box)
+    return None
+
+
+def find_claiming(grid):
+    """行/列内某数字只出现在一个宫，划掉该宫其余格子的候选"""
+    for u in range(18):
+        for num in range(1, 10):
+            bit = BIT[num]
+            pos = _positions(grid, u, bit)
+            if len(pos) < 2:
+                continue
+            b = BOX_OF[pos[0]]
+            if all(BOX_OF[i] == b for i in pos):
+                elims = _eliminations(grid, UNITS[BOX_UNIT_BASE + b], bit, pos)
+                if elims:
+                    return Step('claiming', None, num, elims, u)
+    return None
+
+
+def _find_naked_subset(grid, size, name):
+    cells = grid.cells
+    cands = grid.cands
+    for u, unit in enumerate(UNITS):
+        open_cells = [i for i in unit if not cells[i] and 2 <= POPCOUNT[cands[i]] <= size]
+        if len(open_cells) < size:
+            continue
+        for combo in combinations(open_cells, size):
+            mask = 0
+            for i in combo:
+                mask |= cands[i]
+            if POPCOUNT[mask] != size:
+                continue
+            elims = _eliminations(grid, unit, mask, combo)
+            if elims:
+                return Step(name, None, None, elims, u)
+    return None
+
+
+def _find_hidden_subset(grid, size, name):
+    cells = grid.cells
+    cands = grid.cands
+    for u, unit in enumerate(UNITS):
+        # 每个数字在单元内的位置掩码（9 位，对应单元内第几个格子）
+        where = {}
+        for num in range(1, 10):
+            bit = BIT[num]
+            spots = 0
+            for k, i in enumerate(unit):
+                if not cells[i] and cands[i] & bit:
+                    spots |= 1 << k
+            if 2 <= POPCOUNT[spots] <= size:
+                where[num] = spots
+        if len(where) < size:
+            continue
+        for nums in combinations(where, size):
+            spots = 0
+            for num in nums:
+                spots |= where[num]
+            if POPCOUNT[spots] != size:
+                continue
+            keep = 0
+            for num in nums:
+                keep |= BIT[num]
+            subset = [unit[k] for k in range(9) if spots >> k & 1]
+            elims = tuple((i, cands[i] & ~keep) for i in subset if cands[i] & ~keep)
+            if elims:
+                return Step(name, None, None, elims, u)
+    return None
+
+
+def _find_fish(grid, size, name):
+    """X-Wing（size=2）/ 剑鱼（size=3）：以行或列为基础单元"""
+    cands = grid.cands
+    for num in range(1, 10):
+        bit = BIT[num]
+        for base, cover in ((0, COL_UNIT_BASE), (COL_UNIT_BASE, 0)):
+            lines = {}
+            for k in range(9):
+                spots = 0
+                for j, i in enumerate(UNITS[base + k]):
+                    if cands[i] & bit:
+                        spots |= 1 << j
+                if 2 <= POPCOUNT[spots] <= size:
+                    lines[k] = spots
+            if len(lines) < size:
+                continue
+            for combo in combinations(lines, size):
+                spots = 0
+                for k in combo:
+                    spots |= lines[k]
+                if POPCOUNT[spots] != size:
+                    continue
+                keep = set()
+                for k in combo:
+                    keep.update(UNITS[base + k])
+                elims = ()
+                for j in range(9):
+                    if spots >> j & 1:
+                        elims += _eliminations(grid, UNITS[cover + j], bit, keep)
+                if elims:
+                    return Step(name, None, num, elims, base + combo[0])
+    return None
+
+
+def find_xy_wing(grid):
+    """XY-Wing：枢纽 {a,b}，两翼 {a,c}/{b,c}，两翼共同可见格删去 c"""
+    cells = grid.cells
+    cands = grid.cands
+    pairs = [i for i in range(81) if not cells[i] and POPCOUNT[cands[i]] == 2]
+    pair_set = set(pairs)
+    for pivot in pairs:
+        pm = cands[pivot]
+        wings = [p for p in PEERS[pivot] if p in pair_set and cands[p] != pm
+                 and POPCOUNT[cands[p] & pm] == 1]
+        for w1, w2 in combinations(wings, 2):
+            m1, m2 = cands[w1], cands[w2]
+            c = m1 & m2 & ~pm
+            if not c or (m1 & pm) == (m2 & pm) or (m1 | m2) & ~pm != c:
+                continue
+            common = set(PEERS[w1]).intersection(PEERS[w2])
+            elims = _eliminations(grid, common, c, (pivot,))
+            if elims:
+                return Step('xy_wing', pivot, None, elims, BOX_UNIT_BASE + BOX_OF[pivot])
+    return None
+
+
+def find_simple_coloring(grid):
+    """单数字着色：沿强链接把格子涂成两色，用"同色互见"和"异色夹击"删数"""
+    for num in range(1, 10):
+        bit = BIT[num]
+        links = {}
+        for u in range(27):
+            pos = _positions(grid, u, bit)
+            if len(pos) == 2:
+                a, b = pos
+                links.setdefault(a, set()).add(b)
+                links.setdefault(b, set()).add(a)
+
+        color = {}
+        for start in links:
+            if start in color:
+                continue
+            color[start] = 0
+            component = [start]
+            stack = [start]
+            while stack:
+                i = stack.pop()
+                for j in links[i]:
+                    if j not in color:
+                        color[j] = 1 - color[i]
+                        component.append(j)
+                        stack.append(j)
+            if len(component) < 4:
+                continue
+            groups = ([i for i in component if color[i] == 0],
+                      [i for i in component if color[i] == 1])
+
+            # 同色两格互见：该颜色全部为假
+            for side in groups:
+                side_set = set(side)
+                if any(side_set.intersection(PEERS[i]) for i in side):
+                    elims = _eliminations(grid, side, bit)
+                    if elims:
+                        return Step('simple_coloring', None, num, elims, None)
+
+            # 同时看见两种颜色的格子不能是 num
+            seen0 = set()
+            for i in groups[0]:
+                seen0.update(PEERS[i])
+            seen1 = set()
+            for i in groups[1]:
+                seen1.update(PEERS[i])
+            targets = (seen0 & seen1) - set(component)
+            elims = _eliminations(grid, targets, bit)
+            if elims:
+                return Step('simple_coloring', None, num, elims, None)
+    return None
+
+
+# 按难度顺序尝试的技巧
+FINDERS = (
+    find_hidden_single,
+    find_naked_single,
+    find_pointing,
+    find_claiming,
+    lambda grid: _find_naked_subset(grid, 2, 'naked_pair'),
+    lambda grid: _find_hidden_subset(grid, 2, 'hidden_pair'),
+    lambda grid: _find_naked_subset(grid, 3, 'naked_triple'),
+    lambda grid: _find_hidden_subset(grid, 3, 'hidden_triple'),
+    lambda grid: _find_fish(grid, 2, 'x_wing'),
+    lambda grid: _find_fish(grid, 3, 'swordfish'),
+    find_xy_wing,
+    find_simple_coloring,
+)
+
+
+def next_step(grid, max_technique=None):
+    """找出当前最容易的一步推理，找不到返回 None"""
+    limit = TECHNIQUE_LEVEL[max_technique] if max_technique else len(FINDERS)
+    for finder in FINDERS[:limit + 1]:
+        step = finder(grid)
+        if step is not None:
+            return step
+    return None
+
+
+def apply_step(grid, step):
+    if step.cell is not None and step.digit is not None and not step.eliminations:
+        grid.place(step.cell, step.digit)
+    else:
+        for i, mask in step.eliminations:
+            grid.eliminate(i, mask)
+
+
+def count_singles(grid):
+    """现在能直接用唯一法（隐性或显性唯一）填的格子数"""
+    cands = grid.cands  # 已填的格子候选为 0，不用另外判断
+    found = [POPCOUNT[mask] == 1 for mask in cands]
+    for unit in UNITS:
+        once = twice = 0
+        for i in unit:
+            mask = cands[i]
+            twice |= once & mask
+            once |= mask
+        hidden = once & ~twice
+        if hidden:
+            for i in unit:
+                if cands[i] & hidden:
+                    found[i] = True
+    return sum(found)
+
+
+def grade(board, solution=None, max_steps=400):
+    """逐步用技巧求解，返回 Grade(最难技巧, 总分, 步数, 是否纯技巧解出, 平均可填格数)
+
+    技巧用尽时若给了 solution，就按答案填一格记为 backtracking 再继续。
+    """
+    grid = board if isinstance(board, CandidateGrid) else CandidateGrid(board)
+    grid = grid.copy()
+    if solution is not None:
+        solution = flatten(solution)
+    hardest = 0
+    score = 0
+    steps = 0
+    solved_by_logic = True
+    available = 0
+    counted = 0
+    singles_level = TECHNIQUE_LEVEL['naked_single']
+    while grid.empty and steps < max_steps:
+        if hardest <= singles_level:
+            available += count_singles(grid)
+            counted += 1
+        step = next_step(grid)
+        if step is None:
+            solved_by_logic = False
+            level = TECHNIQUE_LEVEL['backtracking']
+            score += TECHNIQUE_SCORE['backtracking']
+            hardest = max(hardest, level)
+            if solution is None:
+                break
+            i = _most_constrained(grid)
+            grid.place(i, solution[i])
+        else:
+            level = TECHNIQUE_LEVEL[step.technique]
+            score += TECHNIQUE_SCORE[step.technique]
+            hardest = max(hardest, level)
+            apply_step(grid, step)
+        steps += 1
+    choices = round(available / counted) if counted else 0
+    return Grade(TECHNIQUES[hardest][0], score, steps, solved_by_logic and not grid.empty, choices)
+
+
+def _most_constrained(grid):
+    best = -1
+    best_count = 10
+    for i in range(81):
+        if not grid.cells[i] and POPCOUNT[grid.cands[i]] < best_count:
+            best, best_count = i, POPCOUNT[grid.cands[i]]
+    return best
+
+
+def band_distance(result, difficulty):
+    """评级结果离目标难度区间有多远，0 表示落在区间内"""
+    low_tech, high_tech, low_choices, high_choices = DIFFICULTY_BANDS[difficulty]
+    level = TECHNIQUE_LEVEL[result.technique]
+    distance = 0
+    if level < TECHNIQUE_LEVEL[low_tech]:
+        distance += (TECHNIQUE_LEVEL[low_tech] - level) * 100
+    elif level > TECHNIQUE_LEVEL[high_tech]:
+        distance += (level - TECHNIQUE_LEVEL[high_tech]) * 100
+    if result.choices < low_choices:
+        distance += low_choices - result.choices
+    elif high_choices is not None and result.choices > high_choices:
+        distance += result.choices - high_choices
+    return distance
+
+
+def in_band(result, difficulty):
+    """评级结果是否落在目标难度区间"""
+    return band_distance(result, difficulty) == 0
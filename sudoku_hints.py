@@ -0,0 +1,168 @@
+"""
+Sudoku Hint Engine
+逻辑提示：在当前盘面上找最容易的一步技巧，给出格子、数字和理由
+
+直接复用游戏里增量维护的候选网格（只复制一次），删减类技巧在副本上
+连续应用，直到得出一个可以填的数字。
+"""
+
+from collections import namedtuple
+
+from sudoku_board import flatten
+from sudoku_candidates import CandidateGrid
+from sudoku_grader import (BOX_UNIT_BASE, TECHNIQUE_LEVEL, _most_constrained, apply_step, next_step,
+                           unit_name)
+from sudoku_solver import BIT, BOX_OF, BitmaskSolver, UNITS
+
+# technique 之外还有三种结果：conflict（盘面有重复）、mistake（填错导致无解）、backtracking（技巧用尽）
+# eliminations 是得出这一步之前用到的删减步骤
+Hint = namedtuple('Hint', 'technique cell digit unit eliminations')
+
+TECHNIQUE_NAMES = {
+    'zh': {
+        'hidden_single': '隐性唯一',
+        'naked_single': '唯一候选',
+        'pointing': '宫内区块',
+        'claiming': '行列区块',
+        'naked_pair': '显性数对',
+        'hidden_pair': '隐性数对',
+        'naked_triple': '显性三数组',
+        'hidden_triple': '隐性三数组',
+        'x_wing': 'X 翼',
+        'swordfish': '剑鱼',
+        'xy_wing': 'XY 翼',
+        'simple_coloring': '单链染色',
+        'backtracking': '试填',
+        'conflict': '数字冲突',
+        'mistake': '填错了',
+    },
+    'en': {
+        'hidden_single': 'hidden single',
+        'naked_single': 'naked single',
+        'pointing': 'pointing',
+        'claiming': 'claiming',
+        'naked_pair': 'naked pair',
+        'hidden_pair': 'hidden pair',
+        'naked_triple': 'naked triple',
+        'hidden_triple': 'hidden triple',
+        'x_wing': 'X-wing',
+        'swordfish': 'swordfish',
+        'xy_wing': 'XY-wing',
+        'simple_coloring': 'simple coloring',
+        'backtracking': 'trial and error',
+        'conflict': 'conflict',
+        'mistake': 'mistake',
+    },
+}
+
+UNIT_NAMES = {
+    'zh': {'row': '第{}行', 'col': '第{}列', 'box': '第{}宫'},
+    'en': {'row': 'row {}', 'col': 'column {}', 'box': 'box {}'},
+}
+
+
+def find_conflict(grid, solution=None):
+    """找一个与同行/列/宫重复的已填格子，返回 (格子, 单元) 或 None
+
+    重复的两格里给了 solution 就报和答案不符的那个（给定的数字一定和答案相符，
+    所以不会指到题目本身的格子）；没有答案时报单元里靠后的那个。
+    """
+    cells = grid.cells
+    for u, unit in enumerate(UNITS):
+        seen = 0
+        for i in unit:
+            bit = BIT[cells[i]]
+            if seen & bit:
+                if solution is not None and cells[i] == solution[i]:
+                    i = next(j for j in unit if cells[j] == cells[i])
+                return i, u
+            seen |= bit
+    return None
+
+
+def find_hint(grid, solution=None, max_eliminations=30, max_technique=None):
+    """在候选网格上找下一步，返回 Hint；已解完或无从下手时返回 None
+
+    grid 可以是 CandidateGrid、Board 或二维列表。盘面无解时用 solution 定位填错的
+    格子；技巧用尽时按当前盘面现解，所以多解盘面也不依赖存下的答案。
+    """
+    if not isinstance(grid, CandidateGrid):
+        grid = CandidateGrid(grid)
+    if solution is not None:
+        solution = flatten(solution)
+
+    conflict = find_conflict(grid, solution)
+    if conflict is not None:
+        return Hint('conflict', conflict[0], grid.cells[conflict[0]], conflict[1], ())
+    if not grid.empty:
+        return None
+
+    # 先确认当前盘面还有解：填错的格子会让后面的推理建立在错误前提上
+    solved = grid.to_board()
+    if not BitmaskSolver().solve(solved):
+        return _mistake(grid, solution)
+
+    work = grid.copy()
+    eliminations = []
+    for _ in range(max_eliminations + 1):
+        step = next_step(work, max_technique)
+        if step is None:
+            break
+        if step.cell is not None and not step.eliminations:
+            return Hint(step.technique, step.cell, step.digit, step.unit, tuple(eliminations))
+        eliminations.append(step)
+        apply_step(work, step)
+        if not work.is_consistent():
+            break
+    # 技巧用尽：按现解的答案填候选最少的格子
+    i = _most_constrained(grid)
+    return Hint('backtracking', i, solved.cells[i], BOX_UNIT_BASE + BOX_OF[i], ())
+
+
+def _mistake(grid, solution):
+    """盘面无解时指出填错的格子；没有答案可对照就无法定位"""
+    if solution is not None:
+        for i, num in enumerate(grid.cells):
+            if num and num != solution[i]:
+                return Hint('mistake', i, num, BOX_UNIT_BASE + BOX_OF[i], ())
+    return None
+
+
+def describe(hint, language='zh'):
+    """提示 -> 一句理由，例如 'naked single in box 5: r3c4 = 7'"""
+    lang = language if language in TECHNIQUE_NAMES else 'en'
+    names = TECHNIQUE_NAMES[lang]
+    kind, number = unit_name(hint.unit)
+    where = UNIT_NAMES[lang][kind].format(number)
+    row, col = hint.cell // 9 + 1, hint.cell % 9 + 1
+    technique = names[hint.technique]
+
+    if lang == 'zh':
+        cell = f'第{row}行第{col}列'
+        if hint.technique == 'conflict':
+            return f'{cell}的 {hint.digit} 在{where}重复'
+        if hint.technique == 'mistake':
+            return f'{cell}的 {hint.digit} {technique}'
+        text = f'{where}{technique}：{cell}填 {hint.digit}'
+        if hint.technique == 'backtracking':
+            text = f'{technique}：{cell}填 {hint.digit}'
+        if hint.eliminations:
+            text = f'先用{_hardest_name(hint, names)}排除候选，再看' + text
+        return text
+
+    cell = f'r{row}c{col}'
+    if hint.technique == 'conflict':
+        return f'{cell} = {hint.digit} repeats in {where}'
+    if hint.technique == 'mistake':
+        return f'{cell} = {hint.digit} is a {technique}'
+    text = f'{technique} in {where}: {cell} = {hint.digit}'
+    if hint.technique == 'backtracking':
+        text = f'{technique}: {cell} = {hint.digit}'
+    if hint.eliminations:
+        text += f' (after {_hardest_name(hint, names)})'
+    return text
+
+
+def _hardest_name(hint, names):
+    hardest = max(hint.eliminations, key=lambda step: TECHNIQUE_LEVEL[step.technique])
+    return names[hardest.technique]
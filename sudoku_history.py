@@ -0,0 +1,113 @@
+"""
+Sudoku Move History
+撤销/重做：定长环形缓冲，每步一个 32 位记录，容量满了丢最老的步骤
+
+记录位布局（低位在前）：
+    新值(9) | 旧值(9) | 格子(7) | 类型(1：0 数字 / 1 笔记) | 接续(1：与前一条同组)
+数字改动的新旧值是 0-9，笔记改动的是 9 位掩码。
+"""
+
+from array import array
+
+DIGIT = 0
+NOTES = 1
+
+_VALUE_BITS = 9
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_OLD_SHIFT = 9
+_CELL_SHIFT = 18
+_KIND_SHIFT = 25
+_CONTINUE = 1 << 26
+
+
+def encode_move(kind, cell, old, new, continued=False):
+    return ((_CONTINUE if continued else 0) | (kind << _KIND_SHIFT) | (cell << _CELL_SHIFT)
+            | (old << _OLD_SHIFT) | new)
+
+
+def decode_move(record):
+    """记录 -> (类型, 格子, 旧值, 新值)"""
+    return ((record >> _KIND_SHIFT) & 1, (record >> _CELL_SHIFT) & 0x7F,
+            (record >> _OLD_SHIFT) & _VALUE_MASK, record & _VALUE_MASK)
+
+
+class MoveHistory:
+    """[low, cur) 可撤销，[cur, top) 可重做；位置只增不减，取模映射到缓冲区"""
+
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.records = array('I', bytes(4 * capacity))
+        self.low = self.cur = self.top = 0
+        self._depth = 0      # begin_group 嵌套层数
+        self._fresh = False  # 组内还没有记录
+
+    def __len__(self):
+        return self.cur - self.low
+
+    def clear(self):
+        self.low = self.cur = self.top = 0
+
+    def can_undo(self):
+        return self.cur > self.low
+
+    def can_redo(self):
+        return self.top > self.cur
+
+    def begin_group(self):
+        """之后的记录在 end_group 之前算作一步，一起撤销/重做"""
+        if self._depth == 0:
+            self._fresh = True
+        self._depth += 1
+
+    def end_group(self):
+        self._depth -= 1
+
+    def record(self, kind, cell, old, new):
+        """记一步改动（新操作会丢掉可重做的步骤）"""
+        continued = self._depth > 0 and not self._fresh
+        self._fresh = False
+        self.records[self.cur % self.capacity] = encode_move(kind, cell, old, new, continued)
+        self.cur += 1
+        self.top = self.cur
+        if self.cur - self.low > self.capacity:
+            self.low = self.cur - self.capacity
+
+    def undo(self):
+        """撤销一步（一整组），返回要还原的改动，按还原顺序排列"""
+        moves = []
+        records = self.records
+        while self.cur > self.low:
+            self.cur -= 1
+            record = records[self.cur % self.capacity]
+            moves.append(decode_move(record))
+            if not record & _CONTINUE:
+                break
+        return moves
+
+    def redo(self):
+        """重做一步（一整组），返回要重新应用的改动，按应用顺序排列"""
+        moves = []
+        records = self.records
+        while self.cur < self.top:
+            moves.append(decode_move(records[self.cur % self.capacity]))
+            self.cur += 1
+            if self.cur == self.top or not records[self.cur % self.capacity] & _CONTINUE:
+                break
+        return moves
+
+    def export(self):
+        """(可撤销记录, 可重做记录)，都按时间顺序，供存档"""
+        records = self.records
+        undo = [records[pos % self.capacity] for pos in range(self.low, self.cur)]
+        redo = [records[pos % self.capacity] for pos in range(self.cur, self.top)]
+        return undo, redo
+
+    def load(self, undo, redo):
+        """从存档恢复，超出容量时丢最老的撤销记录和最远的重做记录"""
+        undo = list(undo)[-self.capacity:]
+        redo = list(redo)[:self.capacity - len(undo)]
+        self.clear()
+        for record in undo + redo:
+            self.records[self.top] = record
+            self.top += 1
+        self.cur = len(undo)
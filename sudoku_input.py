@@ -0,0 +1,89 @@
+"""
+Sudoku Touch Input
+触摸输入管线：手指和鼠标按下统一成点击，去掉同一次触摸产生的重复事件，
+再按预先算好的布局命中控件（棋盘和数字键用算术，按钮查缓存的矩形表）
+"""
+
+from collections import namedtuple
+
+import pygame
+
+TAP_EVENTS = (pygame.FINGERDOWN, pygame.MOUSEBUTTONDOWN)
+
+# 同一次触摸的手指事件和模拟鼠标事件：时间差和距离都很小
+COALESCE_WINDOW = 0.15
+COALESCE_DISTANCE = 16
+
+# time 是取到事件时的 perf_counter，用来算点击到出帧的延迟
+Tap = namedtuple('Tap', 'pos time')
+
+
+class TapFilter:
+    """事件 -> Tap；不是点击或是重复事件时返回 None"""
+
+    def __init__(self, window=COALESCE_WINDOW, distance=COALESCE_DISTANCE):
+        self.window = window
+        self.distance = distance
+        self.last = None  # (来源, 位置, 时间)
+
+    def feed(self, event, width, height, now):
+        if event.type == pygame.FINGERDOWN:
+            source = 'finger'
+            pos = (int(event.x * width), int(event.y * height))
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            # SDL 用触摸合成的鼠标事件带 touch 标记；滚轮和右键不算点击
+            if getattr(event, 'touch', False) or getattr(event, 'button', 1) != 1:
+                return None
+            source = 'mouse'
+            pos = event.pos
+        else:
+            return None
+
+        last = self.last
+        if (last is not None and last[0] != source and now - last[2] <= self.window
+                and abs(pos[0] - last[1][0]) <= self.distance
+                and abs(pos[1] - last[1][1]) <= self.distance):
+            return None
+        self.last = (source, pos, now)
+        return Tap(pos, now)
+
+
+class HitMap:
+    """布局变化时重建；坐标 -> ('cell', (行, 列)) / ('pad', 数字) / ('button', 名称) / ('menu', 难度)"""
+
+    def __init__(self, grid_x, grid_y, cell_size, pad_x, pad_y, pad_size, pad_gap, buttons, menu):
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.cell_size = cell_size
+        self.span = cell_size * 9  # grid_size 不一定能被 9 整除，以格子实际覆盖的范围为准
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.pad_size = pad_size
+        self.pad_pitch = pad_size + pad_gap
+        self.buttons = tuple(buttons)  # (Rect, 名称)
+        self.menu = tuple(menu)        # (Rect, 难度)
+
+    def game_at(self, pos):
+        x, y = pos
+        dx = x - self.grid_x
+        dy = y - self.grid_y
+        if 0 <= dx < self.span and 0 <= dy < self.span:
+            return 'cell', (dy // self.cell_size, dx // self.cell_size)
+
+        dx = x - self.pad_x
+        if 0 <= y - self.pad_y < self.pad_size and dx >= 0:
+            k, offset = divmod(dx, self.pad_pitch)
+            if k < 9 and offset < self.pad_size:
+                return 'pad', k + 1
+            return None
+
+        for rect, key in self.buttons:
+            if rect.collidepoint(pos):
+                return 'button', key
+        return None
+
+    def menu_at(self, pos):
+        for rect, difficulty in self.menu:
+            if rect.collidepoint(pos):
+                return 'menu', difficulty
+        return None
@@ -4,90 +4,121 @@ Sudoku Logic Module
 """
 
 import random
-import copy
+from sudoku_board import Board, PEERS, flatten
+from sudoku_solver import BitmaskSolver, CELL_UNITS, UNITS, is_solved
 
 class SudokuLogic:
-    def __init__(self):
+    def __init__(self, rng=None):
         self.size = 9
         self.box_size = 3
+        # 随机源：默认使用全局 random，批量生成时传入带种子的 random.Random
+        self.rng = rng or random
+        self.solver = BitmaskSolver()
+        self.bank_path = None
+        self._bank = None
         
     def is_valid(self, board, row, col, num):
-        """检查在指定位置放置数字是否合法"""
-        # Check row
-        if num in board[row]:
+        """检查在指定位置放置数字是否合法（该格本身和同行/列/宫都不能已有 num）"""
+        cells = flatten(board)
+        i = row * 9 + col
+        if cells[i] == num:
             return False
-        
-        # Check column
-        if num in [board[i][col] for i in range(self.size)]:
-            return False
-        
-        # Check 3x3 box
-        box_row, box_col = 3 * (row // 3), 3 * (col // 3)
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if board[i][j] == num:
-                    return False
-        
+        for p in PEERS[i]:
+            if cells[p] == num:
+                return False
         return True
     
     def solve(self, board):
-        """使用回溯法求解数独"""
-        for row in range(self.size):
-            for col in range(self.size):
-                if board[row][col] == 0:
-                    for num in range(1, 10):
-                        if self.is_valid(board, row, col, num):
-                            board[row][col] = num
-                            
-                            if self.solve(board):
-                                return True
-                            
-                            board[row][col] = 0
-                    
-                    return False
-        return True
+        """求解数独（位掩码 + 约束传播），原地填写 board"""
+        return self.solver.solve(board)
     
     def generate_full_board(self):
-        """生成一个完整的数独解"""
-        board = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        """生成一个完整的数独解（Board）"""
+        board = Board()
+        cells = board.cells
         
         # Fill diagonal 3x3 boxes first (they don't affect each other)
         for box in range(0, self.size, 3):
             nums = list(range(1, 10))
-            random.shuffle(nums)
+            self.rng.shuffle(nums)
             for i in range(3):
                 for j in range(3):
-                    board[box + i][box + j] = nums[i * 3 + j]
+                    cells[(box + i) * 9 + box + j] = nums[i * 3 + j]
         
-        # Solve the rest
-        self.solve(board)
+        # Solve the rest (random branch order)
+        self.solver.solve(board, rng=self.rng)
         return board
     
-    def remove_numbers(self, board, difficulty):
-        """根据难度移除数字，创建谜题"""
-        # Difficulty: easy=40, medium=50, hard=60, expert=70
+    def count_solutions(self, board, limit=2):
+        """统计解的个数，找到 limit 个即停止（不修改 board）"""
+        return self.solver.count_solutions(board, limit)
+    
+    def remove_numbers(self, board, difficulty, unique=True):
+        """根据难度移除数字，创建谜题
+        
+        unique=True 时只在谜题仍然唯一解的前提下挖空，
+        实际挖空数可能少于 difficulty（专家难度常见）。
+        """
+        # Difficulty: easy=35, medium=45, hard=55, expert=65
         cells_to_remove = difficulty
         
-        puzzle = copy.deepcopy(board)
-        positions = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(positions)
+        puzzle = Board(board)
+        cells = puzzle.cells
+        positions = list(range(81))
+        self.rng.shuffle(positions)
         
         removed = 0
-        for row, col in positions:
+        for i in positions:
             if removed >= cells_to_remove:
                 break
             
-            backup = puzzle[row][col]
-            puzzle[row][col] = 0
+            backup = cells[i]
+            cells[i] = 0
             
-            # Ensure puzzle still has unique solution (simplified check)
-            # In production, you'd verify uniqueness more thoroughly
+            # Ensure puzzle still has unique solution
+            if unique and self.count_solutions(puzzle, 2) != 1:
+                cells[i] = backup
+                continue
             removed += 1
         
         return puzzle
     
-    def generate_puzzle(self, difficulty='medium'):
-        """生成一个数独谜题"""
+    def generate_puzzle(self, difficulty='medium', unique=True, source='generate', graded=False,
+                        max_attempts=30):
+        """生成一个数独谜题，返回 (puzzle, solution) 两个 Board
+        
+        source='bank' 时优先从离线题库随机抽取，题库缺失或为空则现场生成。
+        source='transform' 时对内置种子题做随机变换，种子题本身唯一解且已评级，
+        所以忽略 unique/graded，几微秒就能出题。
+        graded=True 时按解题技巧评级，反复生成直到落入目标难度区间，
+        max_attempts 次都没命中就返回最接近的一道。
+        """
+        if source == 'bank':
+            bank = self.get_bank()
+            if bank is not None:
+                item = bank.random(difficulty, self.rng)
+                if item is not None:
+                    return item
+        elif source == 'transform':
+            from sudoku_transform import generate
+            return generate(difficulty, self.rng)
+        
+        if not graded:
+            return self._generate_once(difficulty, unique)
+        
+        from sudoku_grader import band_distance, grade
+        best = None
+        best_distance = None
+        for _ in range(max_attempts):
+            puzzle, full_board = self._generate_once(difficulty, True)
+            distance = band_distance(grade(puzzle, full_board), difficulty)
+            if best is None or distance < best_distance:
+                best, best_distance = (puzzle, full_board), distance
+            if distance == 0:
+                break
+        return best
+    
+    def _generate_once(self, difficulty, unique):
         difficulty_map = {
             'easy': 35,
             'medium': 45,
@@ -96,31 +127,109 @@ class SudokuLogic:
         }
         
         full_board = self.generate_full_board()
-        puzzle = self.remove_numbers(full_board, difficulty_map[difficulty])
+        puzzle = self.remove_numbers(full_board, difficulty_map[difficulty], unique)
         
         return puzzle, full_board
     
+    def get_bank(self):
+        """按需打开离线题库（只打开一次），不可用时返回 None"""
+        if self._bank is None:
+            from sudoku_bank import PuzzleBank, DEFAULT_BANK_PATH
+            try:
+                self._bank = PuzzleBank(self.bank_path or DEFAULT_BANK_PATH)
+            except (OSError, ValueError):
+                self._bank = False
+        return self._bank or None
+    
     def check_complete(self, board):
         """检查数独是否完成且正确"""
-        for row in range(self.size):
-            for col in range(self.size):
-                if board[row][col] == 0:
-                    return False
-                
-                # Temporarily remove number to check validity
-                num = board[row][col]
-                board[row][col] = 0
-                if not self.is_valid(board, row, col, num):
-                    board[row][col] = num
-                    return False
-                board[row][col] = num
+        return is_solved(board)
+    
+    def candidate_grid(self, board):
+        """棋盘 -> 候选数网格（之后用 set() 增量维护，不要每帧重算）"""
+        from sudoku_candidates import CandidateGrid
+        return CandidateGrid(board)
+    
+    def find_hint(self, board, solution=None):
+        """逻辑提示：最容易的一步技巧（含理由），board 可以是候选网格"""
+        from sudoku_hints import find_hint
+        return find_hint(board, solution)
+    
+    def get_hint(self, puzzle, solution=None):
+        """获取一个提示：返回 (行, 列, 数字)，没有可填的一步时返回 (None, None, None)"""
+        hint = self.find_hint(puzzle, solution)
+        if hint is None or hint.technique in ('conflict', 'mistake'):
+            return None, None, None
+        return hint.cell // 9, hint.cell % 9, hint.digit
+
+
+class BoardState:
+    """增量棋盘状态：每个行/列/宫的数字计数 + 已填格数
+    
+    落子时只更新三个单元的计数，完成判定和冲突查询都是常数时间。
+    """
+    
+    def __init__(self, board):
+        self.cells = list(flatten(board))
+        # counts[unit][num]：单元 0-8 行、9-17 列、18-26 宫
+        self.counts = [[0] * 10 for _ in range(27)]
+        self.filled = 0
+        self.duplicates = 0
+        for i, num in enumerate(self.cells):
+            if num:
+                self._add(i, num)
+    
+    def _units(self, i):
+        r, c, b = CELL_UNITS[i]
+        return r, 9 + c, 18 + b
+    
+    def _add(self, i, num):
+        self.filled += 1
+        for u in self._units(i):
+            count = self.counts[u]
+            if count[num]:
+                self.duplicates += 1
+            count[num] += 1
+    
+    def _remove(self, i, num):
+        self.filled -= 1
+        for u in self._units(i):
+            count = self.counts[u]
+            count[num] -= 1
+            if count[num]:
+                self.duplicates -= 1
+    
+    def set(self, row, col, num):
+        """更新格子，返回冲突状态可能变化的格子 [(row, col), ...]"""
+        i = row * 9 + col
+        old = self.cells[i]
+        if old == num:
+            return []
+        if old:
+            self._remove(i, old)
+        self.cells[i] = num
+        if num:
+            self._add(i, num)
         
-        return True
+        # 只有三个单元里数字为 old/new 的格子会受影响
+        affected = {i}
+        for u in self._units(i):
+            for j in UNITS[u]:
+                if self.cells[j] and self.cells[j] in (old, num):
+                    affected.add(j)
+        return [(j // 9, j % 9) for j in affected]
+    
+    def is_complete(self):
+        """填满且没有任何重复"""
+        return self.filled == 81 and self.duplicates == 0
     
-    def get_hint(self, puzzle, solution):
-        """获取一个提示（返回一个空格的正确答案）"""
-        empty_cells = [(i, j) for i in range(9) for j in range(9) if puzzle[i][j] == 0]
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            return row, col, solution[row][col]
-        return None, None, None
+    def has_conflict(self, row, col):
+        """该格数字在所在行/列/宫中是否重复"""
+        i = row * 9 + col
+        num = self.cells[i]
+        if not num:
+            return False
+        for u in self._units(i):
+            if self.counts[u][num] > 1:
+                return True
+        return False
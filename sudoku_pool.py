@@ -0,0 +1,133 @@
+"""
+Sudoku Puzzle Pool
+数独谜题池：后台线程按难度预生成谜题，新游戏直接取用
+"""
+
+import threading
+from collections import deque
+from sudoku_logic import SudokuLogic
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+
+
+class PuzzlePool:
+    def __init__(self, depth=2, difficulties=DIFFICULTIES, source='generate', graded=False,
+                 miss_source='transform', dedupe=False, max_redraws=8):
+        self.depth = depth
+        self.source = source
+        self.graded = graded
+        self.miss_source = miss_source
+        # dedupe=True 时记下发出去的每道题（按规范形），等价的题最多重抽 max_redraws 次；
+        # 只在内存里记本次运行，不跨启动保存，不是玩家的历史记录
+        self.dedupe = dedupe
+        self.max_redraws = max_redraws
+        self.seen = None
+        self.pools = {diff: deque() for diff in difficulties}
+        self.hits = 0
+        self.misses = 0
+
+        # 后台线程和主线程各用一个逻辑实例，互不干扰
+        self.worker_logic = SudokuLogic()
+        self.fallback_logic = SudokuLogic()
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """启动后台补货线程"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="puzzle-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程（不清空已生成的谜题）"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def set_depth(self, depth):
+        """调整每个难度的预生成数量"""
+        with self._cond:
+            self.depth = depth
+            self._cond.notify_all()
+
+    def get(self, difficulty):
+        """取出一个 (puzzle, solution)；开启 dedupe 时跳过本次运行中出过的等价题
+
+        变换种子题得到的题都和少数几道种子题等价，查重只会白白重抽，所以不查。
+        命中/未命中每次 get 只记一次，重抽不计入。
+        """
+        item, source = self._take(difficulty)
+        with self._cond:
+            if source == 'pool':
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if self.dedupe and source != 'transform':
+            if self.seen is None:
+                from sudoku_canonical import CanonicalIndex
+                self.seen = CanonicalIndex()
+            for _ in range(self.max_redraws):
+                if self.seen.add(item[0]):
+                    break
+                item, source = self._take(difficulty)
+                if source == 'transform':
+                    break
+        return item
+
+    def _take(self, difficulty):
+        """从池里取一道题，池空时同步出题，返回 (题目, 来源)，来源为 'pool' 或出题方式
+
+        同步出题不能让玩家等回溯生成：题库可用就抽题库，否则按 miss_source 出题
+        （默认变换种子题），miss_source 为 None 时与后台线程的出题方式相同。
+        """
+        with self._cond:
+            pool = self.pools.get(difficulty)
+            item = pool.popleft() if pool else None
+            self._cond.notify_all()
+        if item is not None:
+            return item, 'pool'
+
+        source = self.source
+        if self.miss_source and not (source == 'bank' and self.fallback_logic.get_bank()):
+            source = self.miss_source
+        return self.fallback_logic.generate_puzzle(difficulty, source=source, graded=self.graded), source
+
+    def stats(self):
+        """命中/未命中计数与各难度库存"""
+        with self._cond:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'sizes': {diff: len(pool) for diff, pool in self.pools.items()},
+            }
+
+    def _next_needed(self):
+        """库存最少且未满的难度，全部满了返回 None"""
+        needed = None
+        for diff, pool in self.pools.items():
+            if len(pool) < self.depth and (needed is None or len(pool) < len(self.pools[needed])):
+                needed = diff
+        return needed
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and self._next_needed() is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                difficulty = self._next_needed()
+
+            # 生成时不持锁，主线程可以随时取用
+            item = self.worker_logic.generate_puzzle(difficulty, source=self.source,
+                                                    graded=self.graded)
+            with self._cond:
+                self.pools[difficulty].append(item)
@@ -0,0 +1,157 @@
+"""
+Sudoku Frame Profiler
+帧耗时分析：按需给热点方法加计时，环形缓冲记录，屏幕叠加显示，可导出 trace
+
+未启用时不包装任何方法，游戏循环里只剩一次 None 判断。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+def percentile(values, pct):
+    """values 已排序，返回第 pct 百分位"""
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600, trace_capacity=20000):
+        self.capacity = capacity
+        self.frame_times = deque(maxlen=capacity)      # 每帧工作耗时（毫秒，不含 tick 等待）
+        self.frame_intervals = deque(maxlen=capacity)  # 相邻两帧开始的间隔（毫秒）
+        self.sections = {}                             # 名称 -> deque(每帧自身耗时毫秒)
+        self.tap_latencies = deque(maxlen=capacity)    # 点击到出帧的延迟（毫秒）
+        self.trace = deque(maxlen=trace_capacity)      # (名称, 开始秒, 耗时秒, 线程号)
+        self._frame_sections = {}
+        self._frame_start = None
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    def instrument(self, obj, names, prefix=''):
+        """用计时包装 obj 上的方法（实例属性覆盖，不影响其它实例）"""
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self._wrap(prefix + name, method))
+
+    def _wrap(self, label, fn):
+        stack = self._stack
+        record = self._record
+        main_thread = threading.main_thread()
+
+        def timed(*args, **kwargs):
+            # 后台线程只记 trace，不参与帧内嵌套统计
+            if threading.current_thread() is not main_thread:
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.trace.append((label, start, time.perf_counter() - start, threading.get_ident()))
+
+            start = time.perf_counter()
+            stack.append(0.0)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                record(label, start, elapsed, elapsed - child)
+
+        timed.__wrapped__ = fn
+        return timed
+
+    def _record(self, label, start, elapsed, own):
+        self.trace.append((label, start, elapsed, threading.get_ident()))
+        self._frame_sections[label] = self._frame_sections.get(label, 0.0) + own * 1000
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_intervals.append((now - self._frame_start) * 1000)
+        self._frame_start = now
+        self._frame_sections = {}
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        self.frame_times.append((time.perf_counter() - self._frame_start) * 1000)
+        for label, ms in self._frame_sections.items():
+            ring = self.sections.get(label)
+            if ring is None:
+                ring = self.sections[label] = deque(maxlen=self.capacity)
+            ring.append(ms)
+
+    def record_tap(self, ms):
+        self.tap_latencies.append(ms)
+
+    def summary(self):
+        """FPS、帧耗时 p50/p95/p99、最慢的分段（按每帧平均自身耗时）、点击延迟 p50/p95"""
+        times = sorted(self.frame_times)
+        taps = sorted(self.tap_latencies)
+        intervals = self.frame_intervals
+        fps = 1000 * len(intervals) / sum(intervals) if intervals and sum(intervals) else 0.0
+        slowest = None
+        slowest_ms = 0.0
+        for label, ring in self.sections.items():
+            avg = sum(ring) / max(1, len(times))
+            if avg > slowest_ms:
+                slowest, slowest_ms = label, avg
+        return {
+            'fps': fps,
+            'p50': percentile(times, 50),
+            'p95': percentile(times, 95),
+            'p99': percentile(times, 99),
+            'slowest': slowest,
+            'slowest_ms': slowest_ms,
+            'frames': len(times),
+            'tap_p50': percentile(taps, 50),
+            'tap_p95': percentile(taps, 95),
+            'taps': len(taps),
+        }
+
+    def draw_overlay(self, screen, font, pos=(4, 4)):
+        """左上角绘制统计信息，返回需要刷新的矩形"""
+        import pygame
+
+        info = self.summary()
+        lines = [
+            f"FPS {info['fps']:.1f}",
+            f"p50 {info['p50']:.1f}  p95 {info['p95']:.1f}  p99 {info['p99']:.1f} ms",
+            f"slow {info['slowest'] or '-'} {info['slowest_ms']:.2f} ms",
+            f"tap p50 {info['tap_p50']:.1f}  p95 {info['tap_p95']:.1f} ms",
+        ]
+        surfaces = [font.render(line, True, (0, 255, 150)) for line in lines]
+        width = max(s.get_width() for s in surfaces) + 8
+        height = sum(s.get_height() for s in surfaces) + 8
+        rect = pygame.Rect(pos[0], pos[1], width, height)
+        screen.fill((0, 0, 0), rect)
+        y = rect.y + 4
+        for surf in surfaces:
+            screen.blit(surf, (rect.x + 4, y))
+            y += surf.get_height()
+        return rect
+
+    def dump_trace(self, path):
+        """导出 Chrome trace 格式（chrome://tracing / Perfetto 可直接打开）"""
+        pid = os.getpid()
+        events = [{
+            'name': label,
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 1),
+            'dur': round(elapsed * 1e6, 1),
+            'pid': pid,
+            'tid': tid,
+        } for label, start, elapsed, tid in list(self.trace)]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'traceEvents': events, 'summary': self.summary()}, f)
+        os.replace(tmp_path, path)
+        return len(events)
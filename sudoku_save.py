@@ -0,0 +1,111 @@
+"""
+Sudoku Save Game
+存档：进行中的对局写成紧凑二进制快照，先写临时文件再原子替换，崩溃也不会留下半个文件
+
+文件格式（小端）：
+    头部 18 字节：b'SDKS' | 版本(1) | 难度(1) | 撤销条数(2) | 重做条数(2) | 已用秒数(float32) | 正文 CRC32
+    正文：题目+终盘记录(52，同题库) | 当前盘面半字节打包(41) | 笔记 81x9 位(92) | 历史 4 字节/条
+历史是 sudoku_history 的原始记录，每条只记一次改动（格子、旧值、新值），先撤销部分后重做部分。
+"""
+
+import os
+import struct
+import zlib
+from collections import namedtuple
+
+from sudoku_bank import DIFFICULTIES, RECORD_SIZE, SOLUTION_BYTES, decode_record, encode_record
+from sudoku_board import Board, flatten
+from sudoku_startup import app_data_dir
+
+MAGIC = b'SDKS'
+VERSION = 2
+HEADER = struct.Struct('<4sBBHHfI')
+NOTE_BYTES = (81 * 9 + 7) // 8
+BODY_SIZE = RECORD_SIZE + SOLUTION_BYTES + NOTE_BYTES
+SAVE_NAME = 'savegame.bin'
+
+Snapshot = namedtuple('Snapshot', 'difficulty puzzle solution board notes history redo elapsed')
+
+
+def default_save_path():
+    return os.path.join(app_data_dir(), SAVE_NAME)
+
+
+def pack_digits(digits):
+    """81 个 0-9 数字 -> 41 字节"""
+    digits = list(digits) + [0]
+    return bytes((digits[2 * k] << 4) | digits[2 * k + 1] for k in range(SOLUTION_BYTES))
+
+
+def unpack_digits(data):
+    digits = []
+    for byte in data[:SOLUTION_BYTES]:
+        digits.append(byte >> 4)
+        digits.append(byte & 0x0F)
+    return digits[:81]
+
+
+def encode_snapshot(snapshot):
+    notes = 0
+    for i, mask in enumerate(snapshot.notes):
+        notes |= mask << (9 * i)
+    records = list(snapshot.history) + list(snapshot.redo)
+    history = struct.pack('<%dI' % len(records), *records)
+    body = (encode_record(snapshot.puzzle, snapshot.solution)
+            + pack_digits(flatten(snapshot.board))
+            + notes.to_bytes(NOTE_BYTES, 'little')
+            + history)
+    header = HEADER.pack(MAGIC, VERSION, DIFFICULTIES.index(snapshot.difficulty),
+                         len(snapshot.history), len(snapshot.redo), snapshot.elapsed, zlib.crc32(body))
+    return header + body
+
+
+def decode_snapshot(data):
+    """字节 -> Snapshot，格式或校验不对时抛 ValueError"""
+    if len(data) < HEADER.size + BODY_SIZE:
+        raise ValueError("save file truncated")
+    magic, version, difficulty, undo_count, redo_count, elapsed, crc = HEADER.unpack_from(data, 0)
+    body = data[HEADER.size:]
+    if magic != MAGIC or version != VERSION or difficulty >= len(DIFFICULTIES):
+        raise ValueError("not a save file")
+    count = undo_count + redo_count
+    if len(body) != BODY_SIZE + 4 * count or zlib.crc32(body) != crc:
+        raise ValueError("save file corrupted")
+
+    puzzle, solution = decode_record(body[:RECORD_SIZE])
+    board = Board(bytes(unpack_digits(body[RECORD_SIZE:RECORD_SIZE + SOLUTION_BYTES])))
+    notes = int.from_bytes(body[RECORD_SIZE + SOLUTION_BYTES:BODY_SIZE], 'little')
+    records = struct.unpack_from('<%dI' % count, body, BODY_SIZE)
+    return Snapshot(DIFFICULTIES[difficulty], puzzle, solution, board,
+                    [(notes >> (9 * i)) & 0x1FF for i in range(81)],
+                    list(records[:undo_count]), list(records[undo_count:]), elapsed)
+
+
+def save(path, snapshot):
+    """原子写入：临时文件落盘后再 rename 覆盖旧存档"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_snapshot(snapshot))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    """读取存档，不存在或损坏时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            return decode_snapshot(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def clear(path):
+    """对局结束后删除存档"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,356 @@
+"""
+Sudoku Service
+本地求解/出题服务：asyncio 小型 HTTP/JSON 前端 + 进程池，供题目质检、关卡整理等后台工具调用，
+和游戏用同一套引擎，不导入 pygame
+
+    python sudoku_service.py --port 8765 --jobs 4
+
+接口（只监听本机回环地址）：
+    POST /solve     {"puzzle": "53..7...."}               -> {"solved": true, "solution": "534678912..."}
+    POST /count     {"puzzle": "...", "limit": 2}         -> {"count": 1}
+    POST /grade     {"puzzle": "..."}                     -> {"technique": "x_wing", "score": 123, ...}
+    POST /generate  {"difficulty": "hard", "seed": 7}     -> {"puzzle": "...", "solution": "..."}
+    POST /batch     {"requests": [{"op": "solve", "puzzle": "..."}, ...]} -> {"results": [...]}
+    GET  /stats     请求数、拒绝数、排队数和各接口延迟 p50/p95/p99
+谜题是 81 位字符串（0 或 . 为空格）或 9x9 数组。排队的任务超过上限时返回 503，稍后重试；
+一批的条数不能超过排队上限（否则空闲时也永远排不进去），超过时直接返回 413。
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_board import Board
+from sudoku_profiler import percentile
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+SOURCES = ('generate', 'transform', 'bank')
+
+MAX_BODY = 1 << 20
+MAX_BATCH = 1000
+MAX_COUNT_LIMIT = 1000
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class RequestError(ValueError):
+    """请求内容不对，回 400"""
+
+
+# ---- 工作进程 ----
+
+_logic = None
+
+
+def _worker_logic():
+    global _logic
+    if _logic is None:
+        from sudoku_logic import SudokuLogic
+        _logic = SudokuLogic()
+    return _logic
+
+
+def _solve(params):
+    board = Board.from_string(params['puzzle'])
+    solved = _worker_logic().solve(board)
+    return {'solved': solved, 'solution': board.to_string() if solved else None}
+
+
+def _count(params):
+    board = Board.from_string(params['puzzle'])
+    return {'count': _worker_logic().count_solutions(board, params['limit'])}
+
+
+def _grade(params):
+    from sudoku_grader import band_distance, grade
+
+    board = Board.from_string(params['puzzle'])
+    solution = board.copy()
+    if not _worker_logic().solve(solution):
+        return {'error': 'puzzle has no solution'}
+    result = grade(board, solution)
+    return {
+        'technique': result.technique,
+        'score': result.score,
+        'steps': result.steps,
+        'solved_by_logic': result.solved,
+        'difficulty': min(DIFFICULTIES, key=lambda diff: band_distance(result, diff)),
+    }
+
+
+def _generate(params):
+    from sudoku_logic import SudokuLogic
+
+    logic = _worker_logic()
+    if params['seed'] is not None:
+        logic = SudokuLogic(rng=random.Random(params['seed']))
+    puzzle, solution = logic.generate_puzzle(params['difficulty'], source=params['source'],
+                                             graded=params['graded'])
+    return {'puzzle': puzzle.to_string(), 'solution': solution.to_string()}
+
+
+JOBS = {'solve': _solve, 'count': _count, 'grade': _grade, 'generate': _generate}
+
+
+def run_jobs(jobs):
+    """工作进程入口：顺序执行一组 (op, params)，一次进程间往返处理整块"""
+    return [JOBS[op](params) for op, params in jobs]
+
+
+# ---- 参数校验（前端进程里做，坏请求不进队列） ----
+
+def _puzzle_text(value):
+    if isinstance(value, list):
+        if len(value) != 9 or not all(isinstance(row, list) and len(row) == 9 for row in value):
+            raise RequestError("puzzle must be 9 rows of 9 numbers")
+        value = ''.join(str(num) for row in value for num in row)
+    if not isinstance(value, str):
+        raise RequestError("puzzle must be a string or a 9x9 array")
+    value = value.strip()
+    if len(value) != 81 or any(ch not in '.0123456789' for ch in value):
+        raise RequestError("puzzle must have 81 cells of 0-9 or '.'")
+    return value
+
+
+def parse_job(op, body):
+    """(op, 请求 JSON) -> (op, 规范化参数)，参数不对时抛 RequestError"""
+    if op not in JOBS:
+        raise RequestError(f"unknown op: {op!r}")
+    if not isinstance(body, dict):
+        raise RequestError("request body must be a JSON object")
+    if op == 'generate':
+        difficulty = body.get('difficulty', 'medium')
+        source = body.get('source', 'generate')
+        seed = body.get('seed')
+        graded = body.get('graded', True)
+        if difficulty not in DIFFICULTIES:
+            raise RequestError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+        if source not in SOURCES:
+            raise RequestError(f"source must be one of {', '.join(SOURCES)}")
+        if seed is not None and not isinstance(seed, (int, str)):
+            raise RequestError("seed must be an integer or a string")
+        if not isinstance(graded, bool):
+            raise RequestError("graded must be true or false")
+        return op, {'difficulty': difficulty, 'source': source, 'seed': seed, 'graded': graded}
+
+    params = {'puzzle': _puzzle_text(body.get('puzzle'))}
+    if op == 'count':
+        limit = body.get('limit', 2)
+        if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_COUNT_LIMIT:
+            raise RequestError(f"limit must be an integer in 1..{MAX_COUNT_LIMIT}")
+        params['limit'] = limit
+    return op, params
+
+
+# ---- 前端 ----
+
+class SudokuService:
+    """HTTP 前端：解析请求、校验参数、把计算分块交给进程池，排队超过 max_pending 个任务就拒绝"""
+
+    def __init__(self, jobs=None, max_pending=64, max_batch=MAX_BATCH, executor=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_batch = min(max_batch, max_pending)
+        self.executor = executor or ProcessPoolExecutor(max_workers=self.jobs)
+        self.pending = 0
+        self.requests = 0
+        self.rejected = 0
+        self.latencies = {}  # 路径 -> deque(毫秒)
+
+    async def submit(self, jobs):
+        """把一组任务分成最多 self.jobs 块并行执行，结果按原顺序返回"""
+        loop = asyncio.get_running_loop()
+        size = -(-len(jobs) // self.jobs)
+        chunks = [jobs[k:k + size] for k in range(0, len(jobs), size)]
+        self.pending += len(jobs)
+        try:
+            parts = await asyncio.gather(*(loop.run_in_executor(self.executor, run_jobs, chunk)
+                                           for chunk in chunks))
+        finally:
+            self.pending -= len(jobs)
+        return [result for part in parts for result in part]
+
+    async def start(self):
+        """在开始监听之前拉起工作进程：fork 出的进程会继承父进程当时打开的套接字，
+        晚了的话第一条连接在 close 之后也收不到 EOF"""
+        await asyncio.get_running_loop().run_in_executor(self.executor, run_jobs, [])
+
+    def busy(self, count):
+        return self.pending + count > self.max_pending
+
+    async def dispatch(self, method, path, body):
+        """-> (状态码, JSON 对象)"""
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, self.stats()
+        op = path.strip('/')
+        if op != 'batch' and op not in JOBS:
+            return 404, {'error': f'no such endpoint: {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': 'body is not valid JSON'}
+
+        if op != 'batch':
+            try:
+                job = parse_job(op, request)
+            except RequestError as exc:
+                return 400, {'error': str(exc)}
+            if self.busy(1):
+                self.rejected += 1
+                return 503, {'error': 'busy, retry later'}
+            result = (await self.submit([job]))[0]
+            return (400 if 'error' in result else 200), result
+
+        items = request.get('requests') if isinstance(request, dict) else None
+        if not isinstance(items, list):
+            return 400, {'error': 'batch body must be {"requests": [...]}'}
+        if len(items) > self.max_batch:
+            return 413, {'error': f'at most {self.max_batch} requests per batch'}
+        # 坏的条目就地给出错误，其余照常执行
+        results = [None] * len(items)
+        jobs = []
+        slots = []
+        for k, item in enumerate(items):
+            try:
+                jobs.append(parse_job(item.get('op') if isinstance(item, dict) else None, item))
+                slots.append(k)
+            except RequestError as exc:
+                results[k] = {'error': str(exc)}
+        if self.busy(len(jobs)):
+            self.rejected += 1
+            return 503, {'error': 'busy, retry later'}
+        if jobs:
+            for k, result in zip(slots, await self.submit(jobs)):
+                results[k] = result
+        return 200, {'results': results}
+
+    def record(self, path, ms):
+        ring = self.latencies.get(path)
+        if ring is None:
+            ring = self.latencies[path] = deque(maxlen=10000)
+        ring.append(ms)
+
+    def stats(self):
+        latency = {}
+        for path, ring in self.latencies.items():
+            samples = sorted(ring)
+            latency[path] = {'count': len(samples), 'p50_ms': percentile(samples, 50),
+                             'p95_ms': percentile(samples, 95), 'p99_ms': percentile(samples, 99)}
+        return {'requests': self.requests, 'rejected': self.rejected, 'pending': self.pending,
+                'workers': self.jobs, 'max_pending': self.max_pending, 'max_batch': self.max_batch,
+                'latency': latency}
+
+    async def handle(self, reader, writer):
+        """一个连接：HTTP/1.1，默认保持连接"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                start = time.perf_counter()
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self.respond(writer, 400, {'error': 'malformed request line'}, False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    await self.respond(writer, 413, {'error': 'body too large'}, False)
+                    return
+                body = await reader.readexactly(length) if length else b''
+
+                path = target.split('?', 1)[0]
+                self.requests += 1
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except Exception as exc:  # 工作进程崩溃等：回 500，连接继续可用
+                    status, payload = 500, {'error': f'{type(exc).__name__}: {exc}'}
+                await self.respond(writer, status, payload, keep_alive)
+                self.record(path, (time.perf_counter() - start) * 1000)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = [f'HTTP/1.1 {status} {REASONS[status]}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+        if status == 503:
+            head.append('Retry-After: 1')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def serve(service, host='127.0.0.1', port=8765, ready=None):
+    """在本机回环地址上提供服务，直到被取消；ready(端口) 在开始监听后调用"""
+    try:
+        loopback = host == 'localhost' or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError("the service only listens on a loopback address")
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    if ready:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地数独求解/出题服务")
+    parser.add_argument('--host', default='127.0.0.1', help="回环地址（127.0.0.1、::1 或 localhost）")
+    parser.add_argument('--port', type=int, default=8765, help="端口（0 为随机）")
+    parser.add_argument('-j', '--jobs', type=int, help="工作进程数（默认 CPU 核数）")
+    parser.add_argument('--max-pending', type=int, default=64, help="排队任务上限，超过时返回 503")
+    args = parser.parse_args(argv)
+
+    service = SudokuService(args.jobs, args.max_pending)
+
+    def ready(port):
+        print(f"listening on http://{args.host}:{port} with {service.jobs} workers", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(service, args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
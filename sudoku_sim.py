@@ -0,0 +1,225 @@
+"""
+Sudoku Headless Simulator
+无头模拟：dummy 视频驱动 + 注入事件，脚本化/录制的触摸序列全速回放，统计每次交互延迟
+
+    python sudoku_sim.py --taps 10000 --seed 1          # 随机会话压测
+    python sudoku_sim.py --script taps.json             # 回放脚本
+    python sudoku_sim.py --taps 500 --record taps.json  # 录下随机会话供以后回放
+
+脚本是动作列表（JSON）：
+    ["menu", "hard"]      点击菜单里的难度按钮
+    ["cell", 4, 7]        点击第 4 行第 7 列的格子
+    ["pad", 5]            点击数字键 5
+    ["button", "hint"]    点击功能按钮（delete / notes / undo / redo / hint / check）
+    ["tap", 120, 900]     点击任意像素坐标
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from sudoku_profiler import percentile
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+BUTTONS = ('delete', 'notes', 'undo', 'redo', 'hint', 'check')
+
+
+class Simulator:
+    def __init__(self, size=(720, 1280), language='zh', rich_ui=False, seed=None, finger=True):
+        pygame.font.init()
+        from game_mobile import SudokuGameMobile
+
+        if seed is not None:
+            random.seed(seed)
+        self.finger = finger
+        self.game = SudokuGameMobile(language=language, manual_screen=pygame.Surface(size),
+                                     pool_depth=0, rich_ui=rich_ui, headless=True,
+                                     event_source=self._next_events)
+        self.game.puzzle_pool.stop()
+        if seed is not None:
+            self.game.logic.rng = random.Random(seed)
+            self.game.puzzle_pool.fallback_logic.rng = random.Random(seed)
+
+        self.pending = []
+        self.recording = None
+        self.latencies = {}     # 动作类型 -> [毫秒]
+        self.transitions = {}   # (旧状态, 新状态) -> 次数
+        self.interactions = 0
+
+    # ---- 事件 ----
+
+    def _next_events(self):
+        events, self.pending = self.pending, []
+        return events
+
+    def tap_event(self, pos):
+        """像素坐标 -> 触摸（或鼠标）按下事件"""
+        if self.finger:
+            width, height = self.game.width, self.game.height
+            return pygame.event.Event(pygame.FINGERDOWN, x=pos[0] / width, y=pos[1] / height,
+                                      dx=0.0, dy=0.0, finger_id=0, touch_id=0, pressure=1.0)
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+    def action_pos(self, action):
+        """动作 -> 目标控件中心的像素坐标"""
+        game = self.game
+        kind = action[0]
+        if kind == 'menu':
+            return game.menu_buttons[DIFFICULTIES.index(action[1])][0].center
+        if kind == 'cell':
+            return (game.grid_x + action[2] * game.cell_size + game.cell_size // 2,
+                    game.grid_y + action[1] * game.cell_size + game.cell_size // 2)
+        if kind == 'pad':
+            return game.number_buttons[action[1] - 1]['rect'].center
+        if kind == 'button':
+            return getattr(game, action[1] + '_btn').center
+        if kind == 'tap':
+            return (action[1], action[2])
+        raise ValueError(f"unknown action: {action!r}")
+
+    # ---- 回放 ----
+
+    def step(self, action):
+        """注入一个动作并跑一帧（输入 + 绘制），返回耗时毫秒"""
+        action = list(action)
+        if self.recording is not None:
+            self.recording.append(action)
+        game = self.game
+        before = game.state
+        self.pending.append(self.tap_event(self.action_pos(action)))
+
+        start = time.perf_counter()
+        game.handle_input()
+        game.draw()
+        game.frame_done()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.interactions += 1
+        self.latencies.setdefault(action[0], []).append(elapsed)
+        key = (before, game.state)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        return elapsed
+
+    def replay(self, actions):
+        for action in actions:
+            self.step(action)
+
+    def random_action(self, rng, skill=0.7):
+        """按当前状态挑一个合理的动作；skill 为填对数字的概率，偶尔点空白处"""
+        game = self.game
+        state = game.state
+        if state == 'menu':
+            return ['menu', rng.choice(DIFFICULTIES)]
+        if state == 'won' or rng.random() < 0.02:
+            return ['tap', rng.randrange(game.width), rng.randrange(game.height)]
+        roll = rng.random()
+        if roll < 0.45:
+            # 多数时候去点还没填对的格子，这样随机会话也能走到胜利
+            open_cells = [(r, c) for r in range(9) for c in range(9)
+                          if game.current_board[r, c] != game.solution[r, c]]
+            if open_cells and rng.random() < skill:
+                return ['cell'] + list(rng.choice(open_cells))
+            return ['cell', rng.randrange(9), rng.randrange(9)]
+        if roll < 0.9:
+            if game.selected_cell and rng.random() < skill:
+                r, c = game.selected_cell
+                return ['pad', game.solution[r, c]]
+            return ['pad', rng.randint(1, 9)]
+        return ['button', rng.choice(BUTTONS)]
+
+    def run_random(self, taps, seed=None, skill=0.7):
+        rng = random.Random(seed)
+        for _ in range(taps):
+            self.step(self.random_action(rng, skill))
+
+    # ---- 录制 / 结果 ----
+
+    def start_recording(self):
+        self.recording = []
+
+    def save_script(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.recording or [], f)
+
+    def report(self):
+        """每类动作的延迟分位数和状态转移计数"""
+        latency = {}
+        everything = []
+        for kind, samples in self.latencies.items():
+            samples = sorted(samples)
+            everything.extend(samples)
+            latency[kind] = {'count': len(samples), 'p50_ms': percentile(samples, 50),
+                             'p95_ms': percentile(samples, 95), 'p99_ms': percentile(samples, 99),
+                             'max_ms': samples[-1]}
+        everything.sort()
+        total = sum(everything)
+        taps = sorted(self.game.tap_latencies)
+        return {
+            'interactions': self.interactions,
+            'total_ms': total,
+            'per_second': 1000 * self.interactions / total if total else 0.0,
+            'p50_ms': percentile(everything, 50),
+            'p99_ms': percentile(everything, 99),
+            'tap_to_frame': {'count': len(taps), 'p50_ms': percentile(taps, 50),
+                             'p95_ms': percentile(taps, 95), 'p99_ms': percentile(taps, 99)},
+            'latency': latency,
+            'transitions': {f'{a}->{b}': n for (a, b), n in sorted(self.transitions.items())},
+        }
+
+
+def load_script(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="数独无头模拟 / 交互压测")
+    parser.add_argument('--taps', type=int, default=2000, help="随机会话的点击次数")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子（谜题和点击序列）")
+    parser.add_argument('--skill', type=float, default=0.7, help="随机会话里填对数字的概率")
+    parser.add_argument('--script', help="回放 JSON 动作脚本（代替随机会话）")
+    parser.add_argument('--record', help="把本次动作序列保存为脚本")
+    parser.add_argument('--rich', action='store_true', help="使用 3D 界面渲染")
+    parser.add_argument('--mouse', action='store_true', help="注入鼠标事件而不是触摸事件")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    sim = Simulator(rich_ui=args.rich, seed=args.seed, finger=not args.mouse)
+    if args.record:
+        sim.start_recording()
+    if args.script:
+        sim.replay(load_script(args.script))
+    else:
+        sim.run_random(args.taps, args.seed, args.skill)
+    if args.record:
+        sim.save_script(args.record)
+
+    report = sim.report()
+    print(f"{report['interactions']} interactions in {report['total_ms']:.1f} ms "
+          f"({report['per_second']:.0f}/s), p50 {report['p50_ms']:.3f} ms, p99 {report['p99_ms']:.3f} ms")
+    taps = report['tap_to_frame']
+    print(f"  tap->frame (last {taps['count']}) p50 {taps['p50_ms']:.3f}  p95 {taps['p95_ms']:.3f}  "
+          f"p99 {taps['p99_ms']:.3f} ms")
+    for kind, stats in sorted(report['latency'].items()):
+        print(f"  {kind:<7} n={stats['count']:<6} p50 {stats['p50_ms']:.3f}  p95 {stats['p95_ms']:.3f}  "
+              f"p99 {stats['p99_ms']:.3f}  max {stats['max_ms']:.3f} ms")
+    for name, count in report['transitions'].items():
+        print(f"  {name}: {count}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Sudoku Solver Engine
+数独求解引擎：位掩码 + 约束传播（最少候选优先 / 唯一候选 / 隐性唯一）
+"""
+
+# 格子按 0..80 扁平编号：index = row * 9 + col（下标表在 sudoku_board，这里转出保持旧的导入路径）
+from sudoku_board import (BOX_OF, BOXES, CELL_UNITS, COL_OF, COLS, PEERS, ROW_OF, ROWS, UNITS,
+                          Board, flatten)
+
+# 数字 d 对应第 d-1 位
+ALL_DIGITS = 0x1FF
+BIT = (0,) + tuple(1 << (d - 1) for d in range(1, 10))
+DIGIT_OF_BIT = {BIT[d]: d for d in range(1, 10)}
+DIGITS_OF = tuple(tuple(d for d in range(1, 10) if m & BIT[d]) for m in range(512))
+POPCOUNT = tuple(len(ds) for ds in DIGITS_OF)
+
+
+def is_solved(board):
+    """检查棋盘是否填满且没有任何行/列/宫冲突"""
+    cells = flatten(board)
+    if 0 in cells:
+        return False
+    rows = [0] * 9
+    cols = [0] * 9
+    boxes = [0] * 9
+    for i, num in enumerate(cells):
+        r, c, b = CELL_UNITS[i]
+        bit = BIT[num]
+        if (rows[r] | cols[c] | boxes[b]) & bit:
+            return False
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+    return True
+
+
+class BitmaskSolver:
+    """位掩码求解器
+
+    每行/列/宫用一个 9 位掩码记录已用数字，先做唯一候选与隐性唯一传播，
+    再从候选最少的格子开始分支。传入 rng 时分支顺序随机，用于生成终盘。
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng
+
+    def solve(self, board, rng=None):
+        """原地求解 board（Board 或二维列表），成功返回 True，无解时不修改 board"""
+        state = self._load(board)
+        if state is None:
+            return False
+        result = self._run(state, 1, rng or self.rng)
+        if not result[0]:
+            return False
+        cells = result[1]
+        if isinstance(board, Board):
+            board.cells[:] = bytes(cells)
+        else:
+            for r in range(9):
+                board[r][:] = cells[r * 9:r * 9 + 9]
+        return True
+
+    def count_solutions(self, board, limit=2):
+        """统计解的个数，找到 limit 个后立即停止（不修改 board）"""
+        state = self._load(board)
+        if state is None:
+            return 0
+        return self._run(state, limit, None)[0]
+
+    def _load(self, board):
+        """把棋盘载入为扁平数组 + 掩码，给定数字自相矛盾时返回 None"""
+        cells = list(flatten(board))
+        rows = [0] * 9
+        cols = [0] * 9
+        boxes = [0] * 9
+        for i, num in enumerate(cells):
+            if num:
+                r, c, b = CELL_UNITS[i]
+                bit = BIT[num]
+                if (rows[r] | cols[c] | boxes[b]) & bit:
+                    return None
+                rows[r] |= bit
+                cols[c] |= bit
+                boxes[b] |= bit
+        return cells, rows, cols, boxes
+
+    def _run(self, state, limit, rng):
+        # found = [解的个数, 第一个解]
+        found = [0, None]
+        self._search(state[0], state[1], state[2], state[3], limit, rng, found)
+        return found
+
+    def _search(self, cells, rows, cols, boxes, limit, rng, found):
+        trail = []
+        if self._propagate(cells, rows, cols, boxes, trail):
+            # 选择候选数最少的空格（MRV）
+            best = -1
+            best_mask = 0
+            best_count = 10
+            for i in range(81):
+                if cells[i]:
+                    continue
+                r, c, b = CELL_UNITS[i]
+                mask = ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b])
+                count = POPCOUNT[mask]
+                if count < best_count:
+                    best, best_mask, best_count = i, mask, count
+                    if count == 2:
+                        break
+
+            if best < 0:
+                found[0] += 1
+                if found[1] is None:
+                    found[1] = cells[:]
+            else:
+                digits = DIGITS_OF[best_mask]
+                if rng is not None:
+                    digits = list(digits)
+                    rng.shuffle(digits)
+                r, c, b = CELL_UNITS[best]
+                for num in digits:
+                    bit = BIT[num]
+                    cells[best] = num
+                    rows[r] |= bit
+                    cols[c] |= bit
+                    boxes[b] |= bit
+                    self._search(cells, rows, cols, boxes, limit, rng, found)
+                    cells[best] = 0
+                    rows[r] &= ~bit
+                    cols[c] &= ~bit
+                    boxes[b] &= ~bit
+                    if found[0] >= limit:
+                        break
+
+        # 回滚本层传播填入的数字
+        for i in trail:
+            bit = BIT[cells[i]]
+            r, c, b = CELL_UNITS[i]
+            rows[r] &= ~bit
+            cols[c] &= ~bit
+            boxes[b] &= ~bit
+            cells[i] = 0
+
+    def _propagate(self, cells, rows, cols, boxes, trail):
+        """反复应用唯一候选和隐性唯一，发现矛盾时返回 False"""
+        while True:
+            progress = False
+
+            # 唯一候选：某格只剩一个候选数
+            for i in range(81):
+                if cells[i]:
+                    continue
+                r, c, b = CELL_UNITS[i]
+                mask = ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b])
+                if not mask:
+                    return False
+                if not mask & (mask - 1):
+                    cells[i] = DIGIT_OF_BIT[mask]
+                    rows[r] |= mask
+                    cols[c] |= mask
+                    boxes[b] |= mask
+                    trail.append(i)
+                    progress = True
+            if progress:
+                continue
+
+            # 隐性唯一：某数字在一个单元里只有一个位置
+            for unit in UNITS:
+                once = twice = used = 0
+                for i in unit:
+                    num = cells[i]
+                    if num:
+                        used |= BIT[num]
+                        continue
+                    r, c, b = CELL_UNITS[i]
+                    mask = ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b])
+                    twice |= once & mask
+                    once |= mask
+                if (once | used) != ALL_DIGITS:
+                    return False
+                hidden = once & ~twice & ~used
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for i in unit:
+                        if cells[i]:
+                            continue
+                        r, c, b = CELL_UNITS[i]
+                        if (rows[r] | cols[c] | boxes[b]) & bit:
+                            continue
+                        cells[i] = DIGIT_OF_BIT[bit]
+                        rows[r] |= bit
+                        cols[c] |= bit
+                        boxes[b] |= bit
+                        trail.append(i)
+                        progress = True
+                        break
+                    else:
+                        # 同一格被两个隐性唯一争用
+                        return False
+            if not progress:
+                return True
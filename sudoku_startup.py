@@ -0,0 +1,60 @@
+"""
+Sudoku Startup Cache
+冷启动缓存：上次启动解析出的字体路径、布局参数和首帧耗时，保存在应用私有目录
+
+第一次启动时先用 pygame 自带字体画出首帧，再去找系统字体；之后的启动直接读缓存，
+不再扫描系统字体。
+"""
+
+import json
+import os
+
+CACHE_NAME = 'startup_cache.json'
+
+
+def app_data_dir():
+    """安卓上是应用私有目录（ANDROID_PRIVATE），桌面是用户目录下的隐藏目录"""
+    return os.environ.get('ANDROID_PRIVATE') or os.path.join(os.path.expanduser('~'), '.sudoku_mobile')
+
+
+def default_cache_path():
+    return os.path.join(app_data_dir(), CACHE_NAME)
+
+
+class StartupCache:
+    """小 JSON 字典，读坏了就当没有；改过才写盘（临时文件 + 原子替换）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+        try:
+            with open(path) as f:
+                self.data = json.load(f)
+            if not isinstance(self.data, dict):
+                self.data = {}
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        if key not in self.data or self.data[key] != value:
+            self.data[key] = value
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return False
+        self.dirty = False
+        return True
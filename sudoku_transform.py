@@ -0,0 +1,121 @@
+"""
+Sudoku Transform Generator
+变换出题：从一小批验证过唯一解、评过级的种子题出发，做保持合法性的随机变换
+
+变换包括数字重新编号、带内换行、栈内换列、整带/整栈换位和转置，旋转与镜像都是
+它们的组合。每道种子题能变出 2 x 6^8 x 9! 道不同的题，唯一解和难度等级都保持不变，
+出一道题只要几微秒，同一个随机种子总得到同一道题（例如每日一题）。
+"""
+
+import datetime
+import random
+from collections import namedtuple
+
+from sudoku_board import Board
+from sudoku_solver import BitmaskSolver
+
+# 各难度的种子题（0 为空格），都由 grade 评在该难度区间内并校验过唯一解
+SEEDS = {
+    'easy': (
+        '467100900050070016213096700040020830700080104891350000100943508389060421574008090',
+        '050004803930500001408913520390060708824071900607090034173009680000006142046108070',
+        '472000680060972431910468007021300960000290870809746002005807000037054098280100006',
+        '020540903030070080080010506810097305003854060200601897090065738005700120748120650',
+        '002194653061003098309006204005700139016409020980200476037642080100000062608005007',
+        '060890300010645087047002956650703000030020408020460005092158073501900802080074591',
+        '052000041006400080410085900120638700500790006679012800700850423085140679000067158',
+        '419070532000050168860023079028090746600000291090004853043600900907502004150048020',
+    ),
+    'medium': (
+        '030082941000504000000907050000046010600029035100758020700260090010000460080090572',
+        '000004008600079401100602090070103800403098000800007000946821500010730906030000180',
+        '000680003000004500000015008700809634080340025000007091010408356060100002030090187',
+        '580076000074020108020000000050000630200100840740083001005008014832400900017900306',
+        '000005000001240069340060005083100200005000081060020050000072916612000078704080532',
+        '840000020156003947002100050005041060307056804000908001400002000020609470601000009',
+        '081700930073804056000903800060098070000640213000030600005070000009300524600050701',
+        '040067000080401060206853900000010003079300000530090406023680059000500640650070008',
+    ),
+    'hard': (
+        '070130000020700050009000400002009047600800320400000086010000000700050010000000635',
+        '400000002085000090002003600050410020030902006207000080900200000000506008003000040',
+        '001000060007004900000609018000007003000000546849300070032090000000000000000260301',
+        '060900283000060050950020407010005000030000000500601020000000009020030000043500600',
+        '001073020500400010009000070900085000305100000000009004010000002003041000400090301',
+        '100009007000000590300005000000000009070040300094160208000200010008004065600070020',
+        '000500000000002010793000004900030702000409060600000001005008006309010000046000029',
+        '000400080005620040210080006098000000000040000003000704039000870006203000000900605',
+    ),
+    'expert': (
+        '007000005000342807090000300000297054006000200000004000005060712800100000000070000',
+        '501009704070080009000100000000040006002030007400070800003000452000800000000003080',
+        '008050007100270600000000000760301090305000200000007000000000000080003506021600040',
+        '070100090000006000026009500002000006000560080300000940003200000804000019090000000',
+        '705400000000002009009300405008000000240070000000086050004600100007200600000000030',
+        '200600700090150000600090005000000003000900610700000200060010930080200070030006000',
+        '510000800000180000000003960900000000800510400000037020000025006000006000049000300',
+        '200030094004000000000760010040000000030070080052000700000000000075000130908002050',
+    ),
+}
+
+# cells[i] 是目标格 i 取值的源格；digits 是 bytes.translate 用的 256 字节表（0 保持为 0）
+Transform = namedtuple('Transform', 'cells digits')
+
+_seed_boards = {}
+
+
+def _shuffled_lines(rng):
+    """随机的行（或列）顺序：三条带整体换位，每条带内的三行再各自换位"""
+    bands = [0, 1, 2]
+    rng.shuffle(bands)
+    lines = []
+    for band in bands:
+        inner = [0, 1, 2]
+        rng.shuffle(inner)
+        lines.extend(band * 3 + k for k in inner)
+    return lines
+
+
+def random_transform(rng=random):
+    rows = _shuffled_lines(rng)
+    cols = _shuffled_lines(rng)
+    if rng.random() < 0.5:
+        cells = tuple(rows[r] * 9 + cols[c] for r in range(9) for c in range(9))
+    else:
+        cells = tuple(cols[c] * 9 + rows[r] for r in range(9) for c in range(9))
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+    return Transform(cells, bytes([0] + digits) + bytes(range(10, 256)))
+
+
+def apply_transform(board, transform):
+    """返回变换后的新 Board，原盘面不变"""
+    cells = board.cells if isinstance(board, Board) else Board(board).cells
+    return Board(bytes(map(cells.__getitem__, transform.cells)).translate(transform.digits))
+
+
+def seed_boards(difficulty):
+    """该难度的 [(puzzle, solution)]，第一次用到时才求解种子题"""
+    boards = _seed_boards.get(difficulty)
+    if boards is None:
+        boards = []
+        for text in SEEDS[difficulty]:
+            puzzle = Board.from_string(text)
+            solution = puzzle.copy()
+            BitmaskSolver().solve(solution)
+            boards.append((puzzle, solution))
+        _seed_boards[difficulty] = boards
+    return boards
+
+
+def generate(difficulty, rng=random):
+    """随机取一道种子题并做一次随机变换，返回 (puzzle, solution)"""
+    puzzle, solution = rng.choice(seed_boards(difficulty))
+    transform = random_transform(rng)
+    return apply_transform(puzzle, transform), apply_transform(solution, transform)
+
+
+def daily(difficulty, day=None):
+    """每日一题：同一天、同一难度在任何设备上都是同一道题"""
+    day = day or datetime.date.today()
+    return generate(difficulty, random.Random(f'{day.isoformat()}/{difficulty}'))
@@ -3,75 +3,172 @@ Sudoku UI Manager
 数独UI管理器 - 玻璃态设计
 """
 
-import pygame
+import math
 import random
+from array import array
+
+import pygame
+from sudoku_cache import GlyphCache, SurfaceCache
+
+try:
+    import numpy
+except ImportError:  # 安卓包里没有 numpy 时退回 array
+    numpy = None
+
+PARTICLE_COLOR = (100, 150, 200)
+PARTICLE_LEVELS = 16
+
+
+class ParticleField:
+    """数组存储的背景粒子：坐标/速度分列存放，整批更新并按屏幕尺寸回绕
+
+    粒子数随实测帧耗时自动增减，低端机上会自己降下来。
+    """
+    
+    def __init__(self, width, height, count=50, max_count=150, min_count=10, rng=random):
+        self.width = width
+        self.height = height
+        self.max_count = max_count
+        self.min_count = min_count
+        self.count = min(count, max_count)
+        
+        # 按最大容量一次分配，增减粒子只改 count
+        xs = [rng.random() * width for _ in range(max_count)]
+        ys = [rng.random() * height for _ in range(max_count)]
+        vxs = [(rng.random() - 0.5) * 0.5 for _ in range(max_count)]
+        vys = [(rng.random() - 0.5) * 0.5 for _ in range(max_count)]
+        sizes = [int(rng.random() * 2 + 1) for _ in range(max_count)]
+        if numpy is not None:
+            self.xs = numpy.array(xs, dtype=numpy.float32)
+            self.ys = numpy.array(ys, dtype=numpy.float32)
+            self.vxs = numpy.array(vxs, dtype=numpy.float32)
+            self.vys = numpy.array(vys, dtype=numpy.float32)
+        else:
+            self.xs = array('f', xs)
+            self.ys = array('f', ys)
+            self.vxs = array('f', vxs)
+            self.vys = array('f', vys)
+        self.sizes = sizes
+        
+        # 闪烁亮度分级的调色板，绘制时不再逐个算颜色
+        self.palette = [tuple(int(c * (50 + 100 * k / (PARTICLE_LEVELS - 1)) / 150) for c in PARTICLE_COLOR)
+                        for k in range(PARTICLE_LEVELS)]
+    
+    def resize(self, width, height):
+        """屏幕尺寸变化时把粒子按比例映射到新区域"""
+        if (width, height) == (self.width, self.height):
+            return
+        sx, sy = width / self.width, height / self.height
+        if numpy is not None:
+            self.xs *= sx
+            self.ys *= sy
+        else:
+            for i in range(self.max_count):
+                self.xs[i] *= sx
+                self.ys[i] *= sy
+        self.width, self.height = width, height
+    
+    def update(self):
+        """整批移动并回绕到屏幕内"""
+        n = self.count
+        w, h = self.width, self.height
+        if numpy is not None:
+            xs, ys = self.xs[:n], self.ys[:n]
+            xs += self.vxs[:n]
+            ys += self.vys[:n]
+            numpy.mod(xs, w, out=xs)
+            numpy.mod(ys, h, out=ys)
+            return
+        xs, ys, vxs, vys = self.xs, self.ys, self.vxs, self.vys
+        for i in range(n):
+            x = xs[i] + vxs[i]
+            y = ys[i] + vys[i]
+            xs[i] = x % w
+            ys[i] = y % h
+    
+    def draw(self, surface, current_time):
+        n = self.count
+        phase = current_time / 1000
+        scale = (PARTICLE_LEVELS - 1) / 2
+        if numpy is not None:
+            levels = ((numpy.sin(phase + self.xs[:n]) + 1) * scale).astype(numpy.int32).tolist()
+            xs = self.xs[:n].astype(numpy.int32).tolist()
+            ys = self.ys[:n].astype(numpy.int32).tolist()
+        else:
+            sin = math.sin
+            levels = [int((sin(phase + x) + 1) * scale) for x in self.xs[:n]]
+            xs = [int(x) for x in self.xs[:n]]
+            ys = [int(y) for y in self.ys[:n]]
+        
+        palette = self.palette
+        sizes = self.sizes
+        circle = pygame.draw.circle
+        for i in range(n):
+            circle(surface, palette[levels[i]], (xs[i], ys[i]), sizes[i])
+    
+    def adapt(self, frame_ms, budget_ms=1000 / 60):
+        """按帧耗时调整粒子数：超预算减 20%，很宽裕时加 10%"""
+        if frame_ms > budget_ms * 0.9:
+            self.count = max(self.min_count, int(self.count * 0.8))
+        elif frame_ms < budget_ms * 0.5:
+            self.count = min(self.max_count, max(self.count + 1, int(self.count * 1.1)))
+
 
 class SudokuUIManager:
-    def __init__(self, screen):
+    def __init__(self, screen, glyphs=None):
         self.screen = screen
-        self.particles = []
+        # 字形缓存可与游戏主类共用
+        self.glyphs = glyphs or GlyphCache()
+        self.surfaces = SurfaceCache()
+        self.cell_atlas = {}
+        self.cell_atlas_size = None
+        self.particles = None
         self.init_particles()
     
     def init_particles(self):
-        """初始化背景粒子"""
-        for _ in range(50):
-            self.particles.append({
-                'x': random.random() * 800,
-                'y': random.random() * 600,
-                'vx': (random.random() - 0.5) * 0.5,
-                'vy': (random.random() - 0.5) * 0.5,
-                'size': random.random() * 2 + 1
-            })
+        """初始化背景粒子（铺满实际屏幕）"""
+        width, height = self.screen.get_size()
+        self.particles = ParticleField(width, height)
     
-    def draw_particle_bg(self, current_time):
-        """绘制动态粒子背景"""
-        import math
-        for particle in self.particles:
-            # Update position
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            
-            # Wrap around
-            if particle['x'] < 0: particle['x'] = 800
-            if particle['x'] > 800: particle['x'] = 0
-            if particle['y'] < 0: particle['y'] = 600
-            if particle['y'] > 600: particle['y'] = 0
-            
-            # Draw
-            alpha = int((math.sin(current_time / 1000 + particle['x']) + 1) * 50 + 50)
-            pygame.draw.circle(self.screen, (100, 150, 200, alpha), 
-                             (int(particle['x']), int(particle['y'])), 
-                             int(particle['size']))
+    def draw_particle_bg(self, current_time, frame_ms=None):
+        """绘制动态粒子背景，frame_ms 为上一帧实际耗时（用于自动调整粒子数）"""
+        self.particles.resize(*self.screen.get_size())
+        self.particles.update()
+        self.particles.draw(self.screen, current_time)
+        if frame_ms is not None:
+            self.particles.adapt(frame_ms)
+    
+    def _cached(self, key, build):
+        """按当前屏幕尺寸取面板缓存"""
+        return self.surfaces.get(key, build, self.screen.get_size())
     
     def draw_glass_rect(self, rect, color=(20, 30, 50), alpha=200, border_color=(0, 200, 255), border_width=2):
-        """绘制玻璃态矩形"""
-        # Create surface with alpha
-        surf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        surf.fill((*color, alpha))
+        """绘制玻璃态矩形（半透明底 + 边框预合成）"""
+        def build():
+            # Create surface with alpha
+            surf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
+            surf.fill((*color, alpha))
+            
+            # Draw border
+            if border_width > 0:
+                pygame.draw.rect(surf, border_color, surf.get_rect(), border_width)
+            return surf
         
-        # Draw to screen
-        self.screen.blit(surf, rect.topleft)
+        key = ('glass', rect.size, color, alpha, border_color, border_width)
+        self.screen.blit(self._cached(key, build), rect.topleft)
+    
+    def draw_overlay(self, rect, rgba):
+        """绘制纯色半透明遮罩（阴影、胜利画面背景等）"""
+        def build():
+            surf = pygame.Surface(rect.size, pygame.SRCALPHA)
+            surf.fill(rgba)
+            return surf
         
-        # Draw border
-        if border_width > 0:
-            pygame.draw.rect(self.screen, border_color, rect, border_width)
+        self.screen.blit(self._cached(('overlay', rect.size, rgba), build), rect.topleft)
     
     def draw_neon_text(self, text, pos, font, color=(0, 255, 255), glow_color=None):
         """绘制霓虹文字"""
-        if glow_color is None:
-            glow_color = tuple(max(0, c - 100) for c in color)
-        
-        # Draw glow layers
-        for i in range(3, 0, -1):
-            glow_surf = font.render(text, True, glow_color)
-            glow_rect = glow_surf.get_rect(center=pos)
-            glow_surf.set_alpha(50 * i)
-            self.screen.blit(glow_surf, (glow_rect.x - i, glow_rect.y - i))
-        
-        # Draw main text
-        text_surf = font.render(text, True, color)
-        text_rect = text_surf.get_rect(center=pos)
-        self.screen.blit(text_surf, text_rect)
+        self.glyphs.blit(self.screen, font, text, color, pos, 'neon', glow_color=glow_color)
     
     def draw_button(self, rect, text, font, is_hover=False, active=False):
         """绘制3D按钮"""
@@ -89,99 +186,93 @@ class SudokuUIManager:
             bottom_color = (15, 20, 35)
             border_color = (100, 150, 200)
         
+        state = 'active' if active else 'hover' if is_hover else 'normal'
+        key = ('button', rect.size, state)
+        surf = self._cached(key, lambda: self._paint_button(rect.size, top_color, bottom_color, border_color))
+        self.screen.blit(surf, rect.topleft)
+        
+        # Button text with 3D effect
+        text_color = (255, 255, 255) if is_hover or active else (200, 220, 255)
+        self.draw_3d_text(text, rect.center, font, text_color)
+    
+    def _paint_button(self, size, top_color, bottom_color, border_color):
+        """渐变 + 斜面 + 边框画到一张按钮底图上"""
+        surf = pygame.Surface((size[0] + 1, size[1] + 1), pygame.SRCALPHA)
+        rect = pygame.Rect(0, 0, size[0], size[1])
+        
         # Draw gradient background
         for i in range(rect.height):
             progress = i / rect.height
             r = int(top_color[0] + (bottom_color[0] - top_color[0]) * progress)
             g = int(top_color[1] + (bottom_color[1] - top_color[1]) * progress)
             b = int(top_color[2] + (bottom_color[2] - top_color[2]) * progress)
-            pygame.draw.line(self.screen, (r, g, b), 
+            pygame.draw.line(surf, (r, g, b), 
                            (rect.left, rect.top + i), 
                            (rect.right, rect.top + i))
         
         # 3D border effect
         # Top and left highlight (lighter)
         highlight_color = tuple(min(255, c + 40) for c in top_color)
-        pygame.draw.line(self.screen, highlight_color, rect.topleft, rect.topright, 2)
-        pygame.draw.line(self.screen, highlight_color, rect.topleft, rect.bottomleft, 2)
+        pygame.draw.line(surf, highlight_color, rect.topleft, rect.topright, 2)
+        pygame.draw.line(surf, highlight_color, rect.topleft, rect.bottomleft, 2)
         
         # Bottom and right shadow (darker)
         shadow_color = tuple(max(0, c - 40) for c in bottom_color)
-        pygame.draw.line(self.screen, shadow_color, rect.bottomleft, rect.bottomright, 2)
-        pygame.draw.line(self.screen, shadow_color, rect.topright, rect.bottomright, 2)
+        pygame.draw.line(surf, shadow_color, rect.bottomleft, rect.bottomright, 2)
+        pygame.draw.line(surf, shadow_color, rect.topright, rect.bottomright, 2)
         
         # Outer border
-        pygame.draw.rect(self.screen, border_color, rect, 1)
-        
-        # Button text with 3D effect
-        text_color = (255, 255, 255) if is_hover or active else (200, 220, 255)
-        self.draw_3d_text(text, rect.center, font, text_color)
+        pygame.draw.rect(surf, border_color, rect, 1)
+        return surf
     
     def draw_3d_text(self, text, pos, font, color=(255, 255, 255), depth=2):
         """绘制3D文字（带深度阴影）"""
-        # Draw shadow layers from deep to shallow
-        shadow_color = (0, 0, 0)
-        for i in range(depth, 0, -1):
-            alpha = 100 - (i * 20)
-            shadow_surf = font.render(text, True, shadow_color)
-            shadow_surf.set_alpha(alpha)
-            shadow_rect = shadow_surf.get_rect(center=(pos[0] + i, pos[1] + i))
-            self.screen.blit(shadow_surf, shadow_rect)
-        
-        # Draw main text with highlight
-        text_surf = font.render(text, True, color)
-        text_rect = text_surf.get_rect(center=pos)
-        self.screen.blit(text_surf, text_rect)
-        
-        # Top-left highlight for extra depth
-        highlight_color = tuple(min(255, c + 60) for c in color)
-        highlight_surf = font.render(text, True, highlight_color)
-        highlight_surf.set_alpha(80)
-        highlight_rect = highlight_surf.get_rect(center=(pos[0] - 1, pos[1] - 1))
-        self.screen.blit(highlight_surf, highlight_rect)
+        self.glyphs.blit(self.screen, font, text, color, pos, '3d_text', depth)
     
     def draw_3d_number(self, number, pos, font, color=(255, 255, 255), depth=3):
-        """绘制超立体数字"""
-        text = str(number)
-        
-        # Deep shadow (最深的阴影)
-        for i in range(depth, 0, -1):
-            shadow_alpha = 150 - (i * 30)
-            shadow_surf = font.render(text, True, (0, 0, 0))
-            shadow_surf.set_alpha(shadow_alpha)
-            shadow_rect = shadow_surf.get_rect(center=(pos[0] + i * 2, pos[1] + i * 2))
-            self.screen.blit(shadow_surf, shadow_rect)
-        
-        # Dark outline for definition
-        outline_color = (0, 0, 0)
-        for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1), (-2, 0), (2, 0), (0, -2), (0, 2)]:
-            outline_surf = font.render(text, True, outline_color)
-            outline_surf.set_alpha(150)
-            outline_rect = outline_surf.get_rect(center=(pos[0] + dx, pos[1] + dy))
-            self.screen.blit(outline_surf, outline_rect)
-        
-        # Main number
-        main_surf = font.render(text, True, color)
-        main_rect = main_surf.get_rect(center=pos)
-        self.screen.blit(main_surf, main_rect)
-        
-        # Top-left highlight (高光)
-        highlight_color = tuple(min(255, int(c * 1.3)) for c in color)
-        highlight_surf = font.render(text, True, highlight_color)
-        highlight_surf.set_alpha(120)
-        highlight_rect = highlight_surf.get_rect(center=(pos[0] - 1.5, pos[1] - 1.5))
-        self.screen.blit(highlight_surf, highlight_rect)
+        """绘制超立体数字（阴影、描边、高光预合成为一张图）"""
+        self.glyphs.blit(self.screen, font, str(number), color, pos, '3d_number', depth)
     
-    def draw_3d_cell(self, rect, is_selected=False):
-        """绘制超强3D格子（深度效果增强版）"""
-        # Base colors based on selection
-        if is_selected:
-            base_color = (35, 55, 80)
-            inner_color = (25, 45, 70)
-        else:
-            base_color = (25, 35, 55)
-            inner_color = (15, 25, 45)
-        
+    # 格子图集的变体：(顶部颜色, 底部颜色)
+    CELL_VARIANTS = {
+        'normal': ((25, 35, 55), (15, 25, 45)),
+        'selected': ((35, 55, 80), (25, 45, 70)),
+        'error': ((75, 35, 45), (55, 20, 30)),
+        'fixed': ((30, 42, 66), (20, 30, 52)),
+        'peer': ((30, 47, 70), (20, 37, 60)),
+    }
+    
+    def build_cell_atlas(self, cell_size):
+        """按格子尺寸把每种变体预渲染一次，尺寸不变时直接复用"""
+        if self.cell_atlas_size == cell_size:
+            return self.cell_atlas
+        self.cell_atlas = {}
+        for variant, (base_color, inner_color) in self.CELL_VARIANTS.items():
+            tile = pygame.Surface((cell_size, cell_size))
+            self._paint_cell(tile, pygame.Rect(0, 0, cell_size, cell_size),
+                             base_color, inner_color, variant == 'selected')
+            if pygame.display.get_surface() is not None:
+                tile = tile.convert()
+            self.cell_atlas[variant] = tile
+        self.cell_atlas_size = cell_size
+        return self.cell_atlas
+    
+    def draw_3d_cell(self, rect, is_selected=False, variant=None):
+        """绘制超强3D格子（从预渲染图集 blit）"""
+        atlas = self.build_cell_atlas(rect.width)
+        if variant is None:
+            variant = 'selected' if is_selected else 'normal'
+        self.screen.blit(atlas[variant], rect.topleft)
+    
+    def draw_cell_grid(self, origin, cell_size, variants):
+        """一次 blits 批量绘制 9x9 格子，variants 为 81 个变体名"""
+        atlas = self.build_cell_atlas(cell_size)
+        x0, y0 = origin
+        self.screen.blits([(atlas[variants[i * 9 + j]], (x0 + j * cell_size, y0 + i * cell_size))
+                           for i in range(9) for j in range(9)], doreturn=False)
+    
+    def _paint_cell(self, target, rect, base_color, inner_color, is_selected):
+        """格子的完整 3D 绘制（只在构建图集时调用）"""
         # 1. Draw deep outer shadow first (给格子加外阴影)
         shadow_offset = 3
         shadow_rect = pygame.Rect(rect.x + shadow_offset, rect.y + shadow_offset, 
@@ -193,7 +284,7 @@ class SudokuUIManager:
                            (shadow_offset - i, shadow_offset - i, 
                             rect.width - 2*(shadow_offset - i), 
                             rect.height - 2*(shadow_offset - i)))
-        self.screen.blit(shadow_surf, rect.topleft)
+        target.blit(shadow_surf, rect.topleft)
         
         # 2. Main body with gradient (渐变填充主体)
         for i in range(rect.height):
@@ -202,7 +293,7 @@ class SudokuUIManager:
             r = int(base_color[0] + (inner_color[0] - base_color[0]) * progress)
             g = int(base_color[1] + (inner_color[1] - base_color[1]) * progress)
             b = int(base_color[2] + (inner_color[2] - base_color[2]) * progress)
-            pygame.draw.line(self.screen, (r, g, b),
+            pygame.draw.line(target, (r, g, b),
                            (rect.left, rect.top + i),
                            (rect.right - 1, rect.top + i))
         
@@ -214,7 +305,7 @@ class SudokuUIManager:
             alpha_factor = 1 - (i / bevel_size)
             brightness = int(40 * alpha_factor)
             color = tuple(min(255, c + brightness) for c in base_color)
-            pygame.draw.line(self.screen, color,
+            pygame.draw.line(target, color,
                            (rect.left + i, rect.top + i),
                            (rect.right - i - 1, rect.top + i))
         
@@ -223,7 +314,7 @@ class SudokuUIManager:
             alpha_factor = 1 - (i / bevel_size)
             brightness = int(35 * alpha_factor)
             color = tuple(min(255, c + brightness) for c in base_color)
-            pygame.draw.line(self.screen, color,
+            pygame.draw.line(target, color,
                            (rect.left + i, rect.top + i),
                            (rect.left + i, rect.bottom - i - 1))
         
@@ -232,7 +323,7 @@ class SudokuUIManager:
             alpha_factor = 1 - (i / bevel_size)
             darkness = int(40 * alpha_factor)
             color = tuple(max(0, c - darkness) for c in inner_color)
-            pygame.draw.line(self.screen, color,
+            pygame.draw.line(target, color,
                            (rect.left + i, rect.bottom - i - 1),
                            (rect.right - i - 1, rect.bottom - i - 1))
         
@@ -241,7 +332,7 @@ class SudokuUIManager:
             alpha_factor = 1 - (i / bevel_size)
             darkness = int(35 * alpha_factor)
             color = tuple(max(0, c - darkness) for c in inner_color)
-            pygame.draw.line(self.screen, color,
+            pygame.draw.line(target, color,
                            (rect.right - i - 1, rect.top + i),
                            (rect.right - i - 1, rect.bottom - i - 1))
         
@@ -256,20 +347,20 @@ class SudokuUIManager:
             # Left inner shadow
             pygame.draw.line(inner_shadow_surf, (0, 0, 0, alpha),
                            (i, i), (i, rect.height - i))
-        self.screen.blit(inner_shadow_surf, rect.topleft)
+        target.blit(inner_shadow_surf, rect.topleft)
         
         # 5. Outer highlight for extra pop (外部高光)
         highlight_color = tuple(min(255, c + 60) for c in base_color)
-        pygame.draw.line(self.screen, highlight_color, 
+        pygame.draw.line(target, highlight_color, 
                         (rect.left, rect.top), (rect.right - 1, rect.top), 2)
-        pygame.draw.line(self.screen, highlight_color, 
+        pygame.draw.line(target, highlight_color, 
                         (rect.left, rect.top), (rect.left, rect.bottom - 1), 2)
         
         # 6. Outer shadow edge (外部阴影边缘)
         shadow_edge_color = tuple(max(0, c - 60) for c in inner_color)
-        pygame.draw.line(self.screen, shadow_edge_color, 
+        pygame.draw.line(target, shadow_edge_color, 
                         (rect.left + 1, rect.bottom - 1), (rect.right, rect.bottom - 1), 2)
-        pygame.draw.line(self.screen, shadow_edge_color, 
+        pygame.draw.line(target, shadow_edge_color, 
                         (rect.right - 1, rect.top + 1), (rect.right - 1, rect.bottom), 2)
         
         # 7. Selection glow (enhanced for selected cells)
@@ -279,7 +370,7 @@ class SudokuUIManager:
                 glow_surf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
                 glow_alpha = 80 - (i * 20)
                 glow_surf.fill((0, 255, 255, glow_alpha))
-                self.screen.blit(glow_surf, rect.topleft)
+                target.blit(glow_surf, rect.topleft)
             
             # Bright outline for selected cell
-            pygame.draw.rect(self.screen, (0, 255, 255), rect, 2)
+            pygame.draw.rect(target, (0, 255, 255), rect, 2)